@@ -0,0 +1,300 @@
+"""
+Binary Decision Diagram backend for logic.py sentences.
+
+A knowledge base is compiled once into a reduced ordered BDD, after
+which entailment checks, model counts and model enumeration work on the
+shared graph instead of re-enumerating assignments. `bdd_check` is a
+drop-in alternative to `logic.model_check`.
+"""
+
+import sys
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+FALSE = 0
+TRUE = 1
+
+# Terminals sit below every variable
+TERMINAL_LEVEL = sys.maxsize
+
+
+def order_symbols(sentence, order=None):
+    """
+    Returns symbol names in the order a depth-first walk of `sentence`
+    first meets them, appended to `order` if given. Symbols mentioned
+    together end up close together, which keeps the diagram small.
+    Shared subformulas are walked once.
+    """
+    order = list(order) if order is not None else []
+    seen = set(order)
+    visited = set()
+    stack = [sentence]
+    while stack:
+        sentence = stack.pop()
+        if id(sentence) in visited:
+            continue
+        visited.add(id(sentence))
+        if isinstance(sentence, Symbol):
+            if sentence.name not in seen:
+                seen.add(sentence.name)
+                order.append(sentence.name)
+        elif isinstance(sentence, Not):
+            stack.append(sentence.operand)
+        elif isinstance(sentence, And):
+            stack.extend(reversed(sentence.conjuncts))
+        elif isinstance(sentence, Or):
+            stack.extend(reversed(sentence.disjuncts))
+        elif isinstance(sentence, Implication):
+            stack.extend((sentence.consequent, sentence.antecedent))
+        elif isinstance(sentence, Biconditional):
+            stack.extend((sentence.right, sentence.left))
+    return order
+
+
+class BDD():
+    """
+    Node manager for reduced ordered BDDs.
+    Nodes are integers; 0 and 1 are the terminals. Every other node has
+    a variable level and low/high children, and the unique table makes
+    each (level, low, high) triple exist at most once.
+    """
+
+    def __init__(self, order=None):
+        self.order = []
+        self.levels = dict()
+
+        self.level = [TERMINAL_LEVEL, TERMINAL_LEVEL]
+        self.low = [None, None]
+        self.high = [None, None]
+        self.unique = dict()
+        self.computed = dict()
+        self.compiled = dict()
+
+        for name in order or []:
+            self.declare(name)
+
+    def declare(self, name):
+        """Returns the level of a variable, adding it at the bottom if new."""
+        if name not in self.levels:
+            self.levels[name] = len(self.order)
+            self.order.append(name)
+        return self.levels[name]
+
+    def make(self, level, low, high):
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            node = len(self.level)
+            self.level.append(level)
+            self.low.append(low)
+            self.high.append(high)
+            self.unique[key] = node
+        return node
+
+    def variable(self, name):
+        return self.make(self.declare(name), FALSE, TRUE)
+
+    def cofactors(self, node, level):
+        if self.level[node] == level:
+            return self.low[node], self.high[node]
+        return node, node
+
+    def ite(self, f, g, h):
+        """Returns the node for "if f then g else h"."""
+        if f == TRUE:
+            return g
+        if f == FALSE:
+            return h
+        if g == h:
+            return g
+        if g == TRUE and h == FALSE:
+            return f
+
+        key = (f, g, h)
+        result = self.computed.get(key)
+        if result is not None:
+            return result
+
+        top = min(self.level[f], self.level[g], self.level[h])
+        f0, f1 = self.cofactors(f, top)
+        g0, g1 = self.cofactors(g, top)
+        h0, h1 = self.cofactors(h, top)
+        result = self.make(top, self.ite(f0, g0, h0), self.ite(f1, g1, h1))
+
+        self.computed[key] = result
+        return result
+
+    def negate(self, f):
+        return self.ite(f, FALSE, TRUE)
+
+    def conjoin(self, f, g):
+        return self.ite(f, g, FALSE)
+
+    def disjoin(self, f, g):
+        return self.ite(f, TRUE, g)
+
+    def compile(self, sentence):
+        """Returns the node equivalent to a logical sentence."""
+        if sentence in self.compiled:
+            return self.compiled[sentence]
+
+        if isinstance(sentence, Symbol):
+            node = self.variable(sentence.name)
+        elif isinstance(sentence, Not):
+            node = self.negate(self.compile(sentence.operand))
+        elif isinstance(sentence, And):
+            node = TRUE
+            for conjunct in sentence.conjuncts:
+                node = self.conjoin(node, self.compile(conjunct))
+        elif isinstance(sentence, Or):
+            node = FALSE
+            for disjunct in sentence.disjuncts:
+                node = self.disjoin(node, self.compile(disjunct))
+        elif isinstance(sentence, Implication):
+            node = self.ite(self.compile(sentence.antecedent),
+                            self.compile(sentence.consequent), TRUE)
+        elif isinstance(sentence, Biconditional):
+            right = self.compile(sentence.right)
+            node = self.ite(self.compile(sentence.left),
+                            right, self.negate(right))
+        else:
+            raise TypeError(f"cannot compile {sentence!r}")
+
+        if sentence.is_interned():
+            self.compiled[sentence] = node
+        return node
+
+    def count(self, node, names=None):
+        """
+        Returns the number of assignments to the variables in `names`,
+        by default all declared ones, that satisfy `node`. Every variable
+        `node` depends on must be in `names`.
+        """
+        n = len(self.order)
+        free = 0 if names is None else n - len(set(names) & set(self.order))
+        memo = dict()
+
+        def level(u):
+            return n if u <= TRUE else self.level[u]
+
+        def paths(u):
+            if u <= TRUE:
+                return u
+            if u not in memo:
+                low, high = self.low[u], self.high[u]
+                memo[u] = (paths(low) * 2 ** (level(low) - level(u) - 1)
+                           + paths(high) * 2 ** (level(high) - level(u) - 1))
+            return memo[u]
+
+        # Variables outside names are not tested, so each doubles the count
+        return paths(node) * 2 ** level(node) // 2 ** free
+
+    def models(self, node, names=None):
+        """
+        Yields every assignment to the variables in `names`, by default
+        all declared ones, satisfying `node`, as a dict from symbol name
+        to bool. Every variable `node` depends on must be in `names`.
+        """
+        n = len(self.order)
+
+        def walk(u, i, model):
+            if u == FALSE:
+                return
+            if i == n:
+                yield dict(model)
+                return
+
+            name = self.order[i]
+            if names is not None and name not in names:
+                yield from walk(u, i + 1, model)
+                return
+            if u != TRUE and self.level[u] == i:
+                branches = ((False, self.low[u]), (True, self.high[u]))
+            else:
+                branches = ((False, u), (True, u))
+
+            for value, child in branches:
+                model[name] = value
+                yield from walk(child, i + 1, model)
+            del model[name]
+
+        yield from walk(node, 0, dict())
+
+
+class BDDKnowledgeBase():
+    """
+    A knowledge base compiled to a BDD. Conjuncts added to the
+    underlying And, through `add` or with `And.add` directly, are
+    conjoined incrementally before the next query.
+    """
+
+    def __init__(self, knowledge=None, order=None):
+        if knowledge is None:
+            knowledge = And()
+        elif not isinstance(knowledge, And):
+            knowledge = And(knowledge)
+        self.knowledge = knowledge
+
+        self.manager = BDD(order_symbols(knowledge, order))
+        self.root = TRUE
+        self.conjuncts = 0
+
+        # Conjuncts whose symbols the manager already has in order
+        self.ordered = len(knowledge.conjuncts)
+        self.answers = dict()
+
+    def add(self, sentence):
+        self.knowledge.add(sentence)
+
+    def sync(self):
+        """Conjoins any conjuncts added since the last query."""
+        pending = self.knowledge.conjuncts[self.conjuncts:]
+        if not pending:
+            return
+
+        for i, conjunct in enumerate(pending, self.conjuncts):
+            if i >= self.ordered:
+                for name in order_symbols(conjunct):
+                    self.manager.declare(name)
+            self.root = self.manager.conjoin(
+                self.root, self.manager.compile(conjunct)
+            )
+        self.conjuncts = len(self.knowledge.conjuncts)
+        self.answers = dict()
+
+    def entails(self, query):
+        """Checks if knowledge base entails query."""
+        self.sync()
+        if query not in self.answers:
+            implied = self.manager.ite(
+                self.root, self.manager.compile(query), TRUE
+            )
+            self.answers[query] = implied == TRUE
+        return self.answers[query]
+
+    def satisfiable(self):
+        self.sync()
+        return self.root != FALSE
+
+    def count(self):
+        """
+        Returns the number of models over the knowledge base's symbols.
+        Symbols only queries have mentioned are left out.
+        """
+        self.sync()
+        return self.manager.count(self.root, self.knowledge.symbols())
+
+    def models(self):
+        """
+        Yields every model of the knowledge base, over its own symbols,
+        as a dict.
+        """
+        self.sync()
+        yield from self.manager.models(self.root, self.knowledge.symbols())
+
+
+def bdd_check(knowledge, query):
+    """Checks if knowledge base entails query, using a BDD."""
+    return BDDKnowledgeBase(knowledge).entails(query)
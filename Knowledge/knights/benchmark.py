@@ -0,0 +1,142 @@
+"""
+Benchmark of every entailment engine on generated puzzles.
+
+For each puzzle size, every engine decides every knight/knave symbol of
+the same seeded puzzles. The report gives time and peak memory per
+engine and checks that all engines agree with each other and with the
+hidden solution, which the generator guarantees is the only one.
+Engines are skipped outside the number of symbols they are meant for.
+
+Usage: python benchmark.py [max_inhabitants] [seed]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from bdd import BDDKnowledgeBase
+from dpll import dpll_check
+from generator import generate_puzzle
+from logic import (PARALLEL_MIN_SYMBOLS, model_check, model_check_many,
+                   model_sets)
+from truthtable import TruthTable
+
+SIZES = [2, 3, 4, 6, 8, 10, 12, 16, 20, 30, 40, 50]
+
+PUZZLES_PER_SIZE = 3
+
+
+def truth_table_many(knowledge, queries):
+    symbols = set(knowledge.symbols())
+    for query in queries:
+        symbols |= query.symbols()
+    table = TruthTable(knowledge, symbols)
+    return [table.entails(query) for query in queries]
+
+
+def bdd_many(knowledge, queries):
+    kb = BDDKnowledgeBase(knowledge)
+    return [kb.entails(query) for query in queries]
+
+
+# Name, function answering a list of queries, and the least and most
+# symbols it is run on; model_check only goes parallel from
+# PARALLEL_MIN_SYMBOLS up, so smaller puzzles would time it serially
+ENGINES = [
+    ("model_check",
+     lambda k, qs: [model_check(k, q) for q in qs], 0, 16),
+    ("model_check(parallel)",
+     lambda k, qs: [model_check(k, q, processes=None) for q in qs],
+     PARALLEL_MIN_SYMBOLS, 16),
+    ("model_check_many", model_check_many, 0, 20),
+    ("truth_table", truth_table_many, 0, 24),
+    ("dpll", lambda k, qs: [dpll_check(k, q) for q in qs], 0, None),
+    ("bdd", bdd_many, 0, None),
+]
+
+
+def measure(engine, knowledge, queries):
+    """
+    Runs an engine once for time and once under tracemalloc for memory.
+    Returns its answers, the seconds taken and the peak bytes allocated.
+    """
+
+    # Neither run may reuse models cached by model_check_many
+    model_sets.clear()
+    start = time.perf_counter()
+    answers = engine(knowledge, queries)
+    seconds = time.perf_counter() - start
+
+    model_sets.clear()
+    tracemalloc.start()
+    engine(knowledge, queries)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return answers, seconds, peak
+
+
+def run(sizes, seed):
+    """
+    Benchmarks every engine at every size.
+    Returns False if any engine disagreed with another engine or with
+    the hidden solution.
+    """
+    agreed = True
+
+    for n in sizes:
+        puzzles = [generate_puzzle(n, seed=seed + i)
+                   for i in range(PUZZLES_PER_SIZE)]
+        print(f"{n} inhabitants ({2 * n} symbols):")
+
+        # The first engine to answer each puzzle, and its answers
+        reference = [None] * len(puzzles)
+
+        for name, engine, least, limit in ENGINES:
+            if 2 * n < least or limit is not None and 2 * n > limit:
+                print(f"  {name:<22} skipped")
+                continue
+
+            seconds = 0
+            peak = 0
+            for i, puzzle in enumerate(puzzles):
+                answers, elapsed, memory = measure(
+                    engine, puzzle.knowledge, puzzle.symbols
+                )
+                seconds += elapsed
+                peak = max(peak, memory)
+
+                if reference[i] is None:
+                    reference[i] = (name, answers)
+                elif answers != reference[i][1]:
+                    agreed = False
+                    print(f"  {name:<22} DISAGREES with {reference[i][0]} "
+                          f"on seed {puzzle.seed}")
+
+                expected = [puzzle.solution[symbol.name]
+                            for symbol in puzzle.symbols]
+                if answers != expected:
+                    agreed = False
+                    print(f"  {name:<22} DISAGREES with the solution "
+                          f"on seed {puzzle.seed}")
+
+            print(f"  {name:<22} time={seconds / len(puzzles):.4f}s "
+                  f"peak={peak / 1024:.1f}KiB")
+
+    return agreed
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark.py [max_inhabitants] [seed]")
+    max_n = int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[-1]
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+    sizes = [n for n in SIZES if n <= max_n]
+    if not run(sizes, seed):
+        sys.exit("Engines disagree.")
+    print("All engines agree.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Normalization and CNF conversion for logic.py sentences.
+
+`simplify` flattens nested And/Or, removes duplicate operands, folds
+constants and complementary literals, and eliminates Implication and
+Biconditional. `to_cnf` then Tseitin-encodes the result into clauses
+over integer variables, which stay linear in the size of the sentence.
+"""
+
+from array import array
+
+from logic import And, Biconditional, Implication, Not, Or, Sentence, Symbol
+
+# The empty conjunction is true and the empty disjunction is false
+TRUE = Sentence.canonical(And())
+FALSE = Or()
+
+
+def negate(sentence):
+    """Returns the negation of a simplified sentence."""
+    if sentence == TRUE:
+        return FALSE
+    if sentence == FALSE:
+        return TRUE
+    if isinstance(sentence, Not):
+        return sentence.operand
+    return Not(sentence)
+
+
+def conjunction(operands):
+    """Returns the simplified conjunction of simplified operands."""
+    parts = dict()
+    for operand in operands:
+        if operand == FALSE:
+            return FALSE
+        if isinstance(operand, And):
+            parts.update(dict.fromkeys(operand.conjuncts))
+        else:
+            parts[operand] = None
+
+    if any(negate(part) in parts for part in parts):
+        return FALSE
+    if not parts:
+        return TRUE
+    if len(parts) == 1:
+        return next(iter(parts))
+    return Sentence.canonical(And(*parts))
+
+
+def disjunction(operands):
+    """Returns the simplified disjunction of simplified operands."""
+    parts = dict()
+    for operand in operands:
+        if operand == TRUE:
+            return TRUE
+        if isinstance(operand, Or):
+            parts.update(dict.fromkeys(operand.disjuncts))
+        else:
+            parts[operand] = None
+
+    if any(negate(part) in parts for part in parts):
+        return TRUE
+    if not parts:
+        return FALSE
+    if len(parts) == 1:
+        return next(iter(parts))
+    return Or(*parts)
+
+
+def simplify(sentence, memo=None):
+    """
+    Returns an equivalent sentence built only from Symbol, Not, And and
+    Or, with no nested And in And, no nested Or in Or, no duplicate
+    operands and no double negation. The result is TRUE or FALSE when
+    the sentence is trivially valid or unsatisfiable.
+    """
+    if memo is None:
+        memo = dict()
+    if sentence in memo:
+        return memo[sentence]
+
+    if isinstance(sentence, Symbol):
+        result = sentence
+    elif isinstance(sentence, Not):
+        result = negate(simplify(sentence.operand, memo))
+    elif isinstance(sentence, And):
+        result = conjunction(
+            [simplify(conjunct, memo) for conjunct in sentence.conjuncts]
+        )
+    elif isinstance(sentence, Or):
+        result = disjunction(
+            [simplify(disjunct, memo) for disjunct in sentence.disjuncts]
+        )
+    elif isinstance(sentence, Implication):
+        antecedent = simplify(sentence.antecedent, memo)
+        consequent = simplify(sentence.consequent, memo)
+        result = disjunction([negate(antecedent), consequent])
+    elif isinstance(sentence, Biconditional):
+        left = simplify(sentence.left, memo)
+        right = simplify(sentence.right, memo)
+        result = conjunction([
+            disjunction([negate(left), right]),
+            disjunction([left, negate(right)]),
+        ])
+    else:
+        raise TypeError(f"cannot simplify {sentence!r}")
+
+    if sentence.is_interned():
+        memo[sentence] = result
+    return result
+
+
+class CNF():
+    """
+    Clauses over integer variables 1..num_vars, stored as one flat array
+    of signed literals plus an array of clause start offsets.
+    Symbols get the first variable numbers; every And or Or below the
+    top level gets a fresh Tseitin variable, shared between identical
+    subformulas.
+    """
+
+    def __init__(self):
+        self.literals = array("i")
+        self.starts = array("i", [0])
+        self.num_vars = 0
+        self.variables = dict()
+        self.definitions = dict()
+        self.memo = dict()
+
+    def __len__(self):
+        return len(self.starts) - 1
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self.clause(k)
+
+    def clause(self, k):
+        return self.literals[self.starts[k]:self.starts[k + 1]]
+
+    def add_clause(self, literals):
+        self.literals.extend(literals)
+        self.starts.append(len(self.literals))
+
+    def variable(self, name):
+        """Returns the variable number for the symbol called `name`."""
+        if name not in self.variables:
+            self.num_vars += 1
+            self.variables[name] = self.num_vars
+        return self.variables[name]
+
+    def fresh(self):
+        self.num_vars += 1
+        return self.num_vars
+
+    def assert_sentence(self, sentence):
+        """Adds clauses requiring `sentence` to be true."""
+        sentence = simplify(sentence, self.memo)
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.assert_simplified(conjunct)
+        else:
+            self.assert_simplified(sentence)
+
+    def assert_simplified(self, sentence):
+        if isinstance(sentence, Or):
+            self.add_clause(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        else:
+            self.add_clause([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to a simplified sentence."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.definitions:
+            return self.definitions[sentence]
+
+        v = self.fresh()
+        if isinstance(sentence, And):
+            children = [self.literal(c) for c in sentence.conjuncts]
+            for child in children:
+                self.add_clause((-v, child))
+            self.add_clause([v] + [-child for child in children])
+        elif isinstance(sentence, Or):
+            children = [self.literal(d) for d in sentence.disjuncts]
+            for child in children:
+                self.add_clause((v, -child))
+            self.add_clause([-v] + children)
+        else:
+            raise TypeError(f"cannot encode {sentence!r}")
+
+        self.definitions[sentence] = v
+        return v
+
+
+def to_cnf(*sentences):
+    """Returns the CNF of the conjunction of `sentences`."""
+    cnf = CNF()
+    for sentence in sentences:
+        cnf.assert_sentence(sentence)
+    return cnf
@@ -0,0 +1,177 @@
+"""
+SAT-based entailment for logic.py sentences.
+
+`dpll_check(knowledge, query)` is a drop-in alternative to
+`logic.model_check`: it converts knowledge ∧ ¬query to CNF and decides
+satisfiability with DPLL, so the cost no longer grows as 2^n in the
+number of symbols.
+"""
+
+from cnf import to_cnf
+from logic import Not
+
+
+def satisfiable(clauses, num_vars):
+    """
+    Returns True if the clauses over variables 1..num_vars can all be
+    satisfied, using DPLL with unit propagation on two watched literals
+    per clause and pure-literal elimination up front.
+    """
+    clauses = simplify_clauses(clauses)
+    if clauses is None:
+        return False
+    return Solver(clauses, num_vars).solve()
+
+
+def simplify_clauses(clauses):
+    """
+    Removes duplicate literals, tautologies, and clauses satisfied by
+    pure literals. Returns the remaining clauses, or None if an empty
+    clause makes the problem unsatisfiable.
+    """
+    result = []
+    for clause in clauses:
+        literals = set(clause)
+        if any(-lit in literals for lit in literals):
+            continue
+        if not literals:
+            return None
+        result.append(literals)
+
+    # A literal whose negation never occurs can be made true, which
+    # satisfies every clause containing it; repeat until none remain
+    while True:
+        occurring = set().union(*result)
+        pure = {lit for lit in occurring if -lit not in occurring}
+        if not pure:
+            break
+        result = [clause for clause in result if not clause & pure]
+
+    return [list(clause) for clause in result]
+
+
+class Solver():
+    """
+    DPLL search over a list of clauses with chronological backtracking.
+    """
+
+    def __init__(self, clauses, num_vars):
+        self.num_vars = num_vars
+
+        # 1 for true, -1 for false, 0 for unassigned
+        self.value = [0] * (num_vars + 1)
+        self.trail = []
+        self.head = 0
+
+        # Each clause of two or more literals watches its first two
+        self.watches = dict()
+        self.units = []
+        for clause in clauses:
+            if len(clause) == 1:
+                self.units.append(clause[0])
+            else:
+                self.watches.setdefault(clause[0], []).append(clause)
+                self.watches.setdefault(clause[1], []).append(clause)
+
+        # Branch on the most frequently occurring variables first
+        counts = [0] * (num_vars + 1)
+        for clause in clauses:
+            for lit in clause:
+                counts[abs(lit)] += 1
+        self.order = sorted(
+            (var for var in range(1, num_vars + 1) if counts[var]),
+            key=lambda var: -counts[var]
+        )
+
+    def lit_value(self, lit):
+        v = self.value[abs(lit)]
+        return v if lit > 0 else -v
+
+    def assign(self, lit):
+        self.value[abs(lit)] = 1 if lit > 0 else -1
+        self.trail.append(lit)
+
+    def undo(self, size):
+        """Unassigns everything on the trail beyond its first `size`."""
+        while len(self.trail) > size:
+            self.value[abs(self.trail.pop())] = 0
+        self.head = size
+
+    def propagate(self):
+        """
+        Applies unit propagation to every newly assigned literal.
+        Returns False on conflict.
+        """
+        while self.head < len(self.trail):
+            false_lit = -self.trail[self.head]
+            self.head += 1
+
+            watching = self.watches.get(false_lit, [])
+            i = 0
+            while i < len(watching):
+                clause = watching[i]
+
+                # Keep the falsified watch in the second slot
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+                other = clause[0]
+                if self.lit_value(other) == 1:
+                    i += 1
+                    continue
+
+                # Look for a replacement watch that is not false
+                for k in range(2, len(clause)):
+                    if self.lit_value(clause[k]) != -1:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(clause)
+                        watching[i] = watching[-1]
+                        watching.pop()
+                        break
+                else:
+                    if self.lit_value(other) == -1:
+                        return False
+                    self.assign(other)
+                    i += 1
+        return True
+
+    def decide(self):
+        """Returns an unassigned variable to branch on, or None."""
+        for var in self.order:
+            if not self.value[var]:
+                return var
+        return None
+
+    def solve(self):
+        for lit in self.units:
+            if self.lit_value(lit) == -1:
+                return False
+            if not self.lit_value(lit):
+                self.assign(lit)
+
+        # Each decision records the trail size before it was made and
+        # whether its opposite value has already been tried
+        decisions = []
+        while True:
+            if self.propagate():
+                var = self.decide()
+                if var is None:
+                    return True
+                decisions.append((len(self.trail), var, False))
+                self.assign(var)
+                continue
+
+            while decisions:
+                size, lit, flipped = decisions.pop()
+                self.undo(size)
+                if not flipped:
+                    decisions.append((size, -lit, True))
+                    self.assign(-lit)
+                    break
+            else:
+                return False
+
+
+def dpll_check(knowledge, query):
+    """Checks if knowledge base entails query, using DPLL."""
+    cnf = to_cnf(knowledge, Not(query))
+    return not satisfiable(cnf, cnf.num_vars)
@@ -0,0 +1,142 @@
+"""
+Random knights-and-knaves puzzle generator.
+
+Every inhabitant is either a knight, whose claims are all true, or a
+knave, whose claims are all false. Puzzles are built around a hidden
+solution and gain claims until that solution is the only one.
+"""
+
+import random
+
+from cnf import to_cnf
+from dpll import satisfiable
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class Puzzle():
+    """
+    A generated puzzle: its knowledge base, the symbols to query,
+    the hidden solution mapping each symbol name to its value, and
+    the seed it was generated from.
+    """
+
+    def __init__(self, names, knowledge, solution, seed=None):
+        self.names = names
+        self.seed = seed
+        self.knowledge = knowledge
+        self.solution = solution
+        self.symbols = [
+            symbol for name in names
+            for symbol in (knight(name), knave(name))
+        ]
+
+
+def knight(name):
+    return Symbol(f"{name} is a Knight")
+
+
+def knave(name):
+    return Symbol(f"{name} is a Knave")
+
+
+def inhabitant_names(n):
+    """Returns n names: A to Z, then P26, P27 and so on."""
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    return [letters[i] if i < len(letters) else f"P{i}" for i in range(n)]
+
+
+def random_claim(rng, names, depth):
+    """
+    Returns a random claim about the inhabitants, nested up to `depth`
+    connectives deep.
+    """
+    if depth == 0 or rng.random() < 0.3:
+        name = rng.choice(names)
+        return knight(name) if rng.random() < 0.5 else knave(name)
+
+    kind = rng.randrange(5)
+    if kind == 0:
+        return Not(random_claim(rng, names, depth - 1))
+    if kind == 1:
+        return And(random_claim(rng, names, depth - 1),
+                   random_claim(rng, names, depth - 1))
+    if kind == 2:
+        return Or(random_claim(rng, names, depth - 1),
+                  random_claim(rng, names, depth - 1))
+    if kind == 3:
+        return Implication(random_claim(rng, names, depth - 1),
+                           random_claim(rng, names, depth - 1))
+    return Biconditional(random_claim(rng, names, depth - 1),
+                         random_claim(rng, names, depth - 1))
+
+
+def unique(knowledge, solution):
+    """Checks if the solution is the only model of the knowledge base."""
+    other = Not(And(*[
+        Symbol(name) if value else Not(Symbol(name))
+        for name, value in solution.items()
+    ]))
+    cnf = to_cnf(knowledge, other)
+    return not satisfiable(cnf, cnf.num_vars)
+
+
+def generate_puzzle(n, seed=None, depth=2, max_claims=None, attempts=100):
+    """
+    Returns a Puzzle with n inhabitants whose hidden solution satisfies
+    every claim and is the knowledge base's only model. Claims are added
+    one at a time, by a random inhabitant, until the solution is unique.
+    An attempt that makes `max_claims` (by default 4n) claims without
+    getting there is thrown away and the puzzle is rebuilt from a seed
+    derived from `seed`, so a given seed always gives the same puzzle.
+    Raises ValueError if no attempt succeeds.
+    """
+    if max_claims is None:
+        max_claims = 4 * n
+
+    for attempt in range(attempts):
+        rng = random.Random(seed if attempt == 0 or seed is None
+                            else f"{seed}/{attempt}")
+        puzzle = build_puzzle(n, rng, depth, max_claims)
+        if unique(puzzle.knowledge, puzzle.solution):
+            puzzle.seed = seed
+            return puzzle
+
+    raise ValueError(
+        f"no unique puzzle with {n} inhabitants after {attempts} attempts"
+    )
+
+
+def build_puzzle(n, rng, depth, max_claims):
+    """
+    Makes up to `max_claims` claims about a random hidden solution,
+    stopping once it is the only one. Returns the Puzzle, which may
+    still have other solutions.
+    """
+    names = inhabitant_names(n)
+    is_knight = {name: rng.random() < 0.5 for name in names}
+
+    solution = dict()
+    for name in names:
+        solution[knight(name).name] = is_knight[name]
+        solution[knave(name).name] = not is_knight[name]
+
+    # Every inhabitant is either a knight or a knave, but not both
+    knowledge = And()
+    for name in names:
+        knowledge.add(Or(knight(name), knave(name)))
+        knowledge.add(Not(And(knight(name), knave(name))))
+
+    for _ in range(max_claims):
+        if unique(knowledge, solution):
+            break
+
+        # Knights only make true claims and knaves only false ones
+        speaker = rng.choice(names)
+        claim = random_claim(rng, names, depth)
+        if claim.evaluate(solution) != is_knight[speaker]:
+            claim = Not(claim)
+
+        knowledge.add(Biconditional(knight(speaker), claim))
+        knowledge.add(Biconditional(knave(speaker), Not(claim)))
+
+    return Puzzle(names, knowledge, solution)
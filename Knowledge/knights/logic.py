@@ -1,8 +1,21 @@
 import itertools
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import reduce
 
 
 class Sentence():
 
+    # Every sentence caches its hash and the frozen set of its symbol
+    # names when it is built. Apart from top-level And nodes, which stay
+    # mutable through `And.add`, sentences are interned: building a
+    # structurally identical sentence returns the existing object.
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    _interned = weakref.WeakValueDictionary()
+
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
@@ -13,13 +26,75 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(getattr(self, "_symbols", ()))
+
+    def source(self, index):
+        """
+        Returns a Python expression evaluating the sentence on a model
+        bitmask `m`, where bit index[name] holds the value of a symbol.
+        """
+        raise Exception("nothing to compile")
+
+    def closure(self, index):
+        """Returns a function evaluating the sentence on a bitmask."""
+        raise Exception("nothing to compile")
+
+    def compile(self, symbols):
+        """
+        Returns a function evaluating the sentence on a model given as an
+        integer bitmask, where bit i holds the value of symbols[i].
+        """
+        index = {name: i for i, name in enumerate(symbols)}
+        try:
+            return eval(f"lambda m: bool({self.source(index)})")
+        except (RecursionError, SyntaxError, MemoryError):
+            # Too deeply nested for the Python parser
+            closure = self.closure(index)
+            return lambda m: bool(closure(m))
+
+    def is_interned(self):
+        """
+        Checks if the sentence is interned, and so never changes and can
+        key a cache. Only an And that `And.add` can still grow is not;
+        the frozen Ands that `canonical` shares as operands are.
+        """
+        return type(self) is not And or self._frozen
 
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
             raise TypeError("must be a logical sentence")
 
+    @classmethod
+    def canonical(cls, sentence):
+        """
+        Returns the interned sentence equal to `sentence`, for use as
+        an operand. A mutable And is replaced by a frozen shared copy.
+        """
+        Sentence.validate(sentence)
+        if type(sentence) is And and not sentence._frozen:
+            conjuncts = sentence.conjuncts
+            key = (And, *map(id, conjuncts))
+            shared = Sentence._interned.get(key)
+            if shared is None:
+                shared = And(*conjuncts)
+                shared._frozen = True
+                Sentence._interned[key] = shared
+            return shared
+        return sentence
+
+    @classmethod
+    def interned(cls, key, build):
+        """
+        Returns the sentence stored under `key`, calling `build` to
+        create and store it the first time.
+        """
+        sentence = Sentence._interned.get(key)
+        if sentence is None:
+            sentence = build()
+            Sentence._interned[key] = sentence
+        return sentence
+
     @classmethod
     def parenthesize(cls, s):
         """Parenthesizes an expression if not already parenthesized."""
@@ -43,15 +118,27 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        def build():
+            symbol = object.__new__(cls)
+            symbol.name = name
+            symbol._hash = hash(("symbol", name))
+            symbol._symbols = frozenset((name,))
+            return symbol
+        return Sentence.interned((cls, name), build)
+
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (
+            isinstance(other, Symbol) and self.name == other.name
+        )
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        return self._hash
 
     def __repr__(self):
         return self.name
@@ -65,20 +152,44 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def slot(self, index):
+        try:
+            return index[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def source(self, index):
+        return f"(m >> {self.slot(index)} & 1)"
+
+    def closure(self, index):
+        i = self.slot(index)
+        return lambda m: m >> i & 1
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
+        operand = Sentence.canonical(operand)
+
+        def build():
+            sentence = object.__new__(cls)
+            sentence.operand = operand
+            sentence._hash = hash(("not", operand._hash))
+            sentence._symbols = operand._symbols
+            return sentence
+        return Sentence.interned((cls, id(operand)), build)
+
+    def __reduce__(self):
+        return (Not, (self.operand,))
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and self.operand == other.operand
+        )
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return self._hash
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,23 +200,39 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def source(self, index):
+        return f"(not {self.operand.source(index)})"
+
+    def closure(self, index):
+        operand = self.operand.closure(index)
+        return lambda m: not operand(m)
 
 
 class And(Sentence):
+    __slots__ = ("conjuncts", "_frozen")
+
     def __init__(self, *conjuncts):
-        for conjunct in conjuncts:
-            Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+        self.conjuncts = [Sentence.canonical(c) for c in conjuncts]
+        self._frozen = False
+        self._hash = None
+        self._symbols = frozenset().union(
+            *[conjunct._symbols for conjunct in self.conjuncts]
+        )
+
+    def __reduce__(self):
+        return (And, tuple(self.conjuncts))
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And) and self.conjuncts == other.conjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        if self._hash is None:
+            self._hash = hash(
+                ("and", tuple(conjunct._hash for conjunct in self.conjuncts))
+            )
+        return self._hash
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,8 +241,12 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
+        if self._frozen:
+            raise TypeError("cannot add to a shared sentence")
+        conjunct = Sentence.canonical(conjunct)
         self.conjuncts.append(conjunct)
+        self._hash = None
+        self._symbols = self._symbols | conjunct._symbols
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -126,23 +257,46 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def source(self, index):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            [conjunct.source(index) for conjunct in self.conjuncts]
+        ) + ")"
+
+    def closure(self, index):
+        conjuncts = [conjunct.closure(index) for conjunct in self.conjuncts]
+        return lambda m: all(conjunct(m) for conjunct in conjuncts)
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
-        for disjunct in disjuncts:
-            Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
+        disjuncts = [Sentence.canonical(d) for d in disjuncts]
+
+        def build():
+            sentence = object.__new__(cls)
+            sentence.disjuncts = disjuncts
+            sentence._hash = hash(
+                ("or", tuple(disjunct._hash for disjunct in disjuncts))
+            )
+            sentence._symbols = frozenset().union(
+                *[disjunct._symbols for disjunct in disjuncts]
+            )
+            return sentence
+        return Sentence.interned((cls, *map(id, disjuncts)), build)
+
+    def __reduce__(self):
+        return (Or, tuple(self.disjuncts))
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and self.disjuncts == other.disjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return self._hash
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -157,24 +311,50 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def source(self, index):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            [disjunct.source(index) for disjunct in self.disjuncts]
+        ) + ")"
+
+    def closure(self, index):
+        disjuncts = [disjunct.closure(index) for disjunct in self.disjuncts]
+        return lambda m: any(disjunct(m) for disjunct in disjuncts)
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
-        Sentence.validate(antecedent)
-        Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
+        antecedent = Sentence.canonical(antecedent)
+        consequent = Sentence.canonical(consequent)
+
+        def build():
+            sentence = object.__new__(cls)
+            sentence.antecedent = antecedent
+            sentence.consequent = consequent
+            sentence._hash = hash(
+                ("implies", antecedent._hash, consequent._hash)
+            )
+            sentence._symbols = antecedent._symbols | consequent._symbols
+            return sentence
+        return Sentence.interned(
+            (cls, id(antecedent), id(consequent)), build
+        )
+
+    def __reduce__(self):
+        return (Implication, (self.antecedent, self.consequent))
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (
+            isinstance(other, Implication)
+            and self.antecedent == other.antecedent
+            and self.consequent == other.consequent
+        )
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return self._hash
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,24 +368,45 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def source(self, index):
+        antecedent = self.antecedent.source(index)
+        consequent = self.consequent.source(index)
+        return f"(not {antecedent} or {consequent})"
+
+    def closure(self, index):
+        antecedent = self.antecedent.closure(index)
+        consequent = self.consequent.closure(index)
+        return lambda m: not antecedent(m) or consequent(m)
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
-        Sentence.validate(left)
-        Sentence.validate(right)
-        self.left = left
-        self.right = right
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
+        left = Sentence.canonical(left)
+        right = Sentence.canonical(right)
+
+        def build():
+            sentence = object.__new__(cls)
+            sentence.left = left
+            sentence.right = right
+            sentence._hash = hash(("biconditional", left._hash, right._hash))
+            sentence._symbols = left._symbols | right._symbols
+            return sentence
+        return Sentence.interned((cls, id(left), id(right)), build)
+
+    def __reduce__(self):
+        return (Biconditional, (self.left, self.right))
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (
+            isinstance(other, Biconditional)
+            and self.left == other.left
+            and self.right == other.right
+        )
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return self._hash
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -221,43 +422,198 @@ class Biconditional(Sentence):
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
+    # Operands evaluate to 0/1 or False/True, which compare equal
+    # pairwise, so each side is evaluated only once
+    def source(self, index):
+        return f"({self.left.source(index)} == {self.right.source(index)})"
 
-        # If model has an assignment for each symbol
-        if not symbols:
+    def closure(self, index):
+        left = self.left.closure(index)
+        right = self.right.closure(index)
+        return lambda m: bool(left(m)) == bool(right(m))
 
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+def model_check(knowledge, query, processes=1):
+    """
+    Checks if knowledge base entails query.
+    With `processes` other than 1 (None meaning one per CPU), the models
+    are split across a process pool; see parallel_model_check.
+    """
+    if processes != 1:
+        return parallel_model_check(knowledge, query, processes)
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+
+    # Compile both sentences to functions of a model bitmask
+    knowledge_true = knowledge.compile(symbols)
+    query_true = query.compile(symbols)
+
+    # Each integer below 2^n is one model, with bit i the value of
+    # symbols[i]; the query must hold in every model of the knowledge
+    for model in range(1 << len(symbols)):
+        if knowledge_true(model) and not query_true(model):
+            return False
+    return True
+
+
+# Below this many symbols starting a pool costs more than it saves
+PARALLEL_MIN_SYMBOLS = 16
+
+# How often, in models, workers look for a stop request
+STOP_CHECK_INTERVAL = 4096
+
+# Compiled sentences and stop flag of the current pool worker
+worker_state = dict()
+
+
+def init_worker(knowledge, query, symbols, split, stop):
+    worker_state["knowledge"] = knowledge.compile(symbols)
+    worker_state["query"] = query.compile(symbols)
+    worker_state["rest"] = len(symbols) - split
+    worker_state["split"] = split
+    worker_state["stop"] = stop
+
+
+def check_subspace(prefix):
+    """
+    Checks the models whose first `split` symbols are fixed by the bits
+    of `prefix`. Returns False and raises the stop flag on finding a
+    counter-model, None if stopped early, and True otherwise.
+    """
+    knowledge_true = worker_state["knowledge"]
+    query_true = worker_state["query"]
+    split = worker_state["split"]
+    stop = worker_state["stop"]
+
+    for rest in range(1 << worker_state["rest"]):
+        if not rest % STOP_CHECK_INTERVAL and stop.is_set():
+            return None
+        model = rest << split | prefix
+        if knowledge_true(model) and not query_true(model):
+            stop.set()
+            return False
+    return True
+
+
+def parallel_model_check(knowledge, query, processes=None, split=None):
+    """
+    Checks if knowledge base entails query, fixing the first `split`
+    symbols in each of the 2^split sub-spaces and checking those in a
+    pool of `processes` workers. All workers stop as soon as any of
+    them finds a counter-model.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    processes = processes or os.cpu_count() or 1
+
+    if processes == 1 or len(symbols) < PARALLEL_MIN_SYMBOLS:
+        return model_check(knowledge, query)
+
+    # Several sub-spaces per worker keep the pool busy to the end
+    if split is None:
+        split = (4 * processes - 1).bit_length()
+    split = min(split, len(symbols))
+
+    stop = multiprocessing.Event()
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=init_worker,
+        initargs=(knowledge, query, symbols, split, stop),
+    ) as executor:
+        pending = {
+            executor.submit(check_subspace, prefix)
+            for prefix in range(1 << split)
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            if any(future.result() is False for future in done):
+                stop.set()
+                for future in pending:
+                    future.cancel()
+                return False
+    return True
+
+
+class ModelSet():
+    """
+    The models of a knowledge base, enumerated once so that any number
+    of queries over its symbols can be decided without re-enumerating.
+    """
+
+    def __init__(self, knowledge):
+        self.symbols = sorted(knowledge.symbols())
+        self.index = {name: i for i, name in enumerate(self.symbols)}
+
+        knowledge_true = knowledge.compile(self.symbols)
+        self.models = [
+            model for model in range(1 << len(self.symbols))
+            if knowledge_true(model)
+        ]
+
+        # Bits set in every model, and bits set in at least one model
+        everything = (1 << len(self.symbols)) - 1
+        self.always = reduce(lambda x, y: x & y, self.models, everything)
+        self.sometimes = reduce(lambda x, y: x | y, self.models, 0)
+
+        self.answers = dict()
+
+    def covers(self, query):
+        """Checks if every symbol of query is a symbol of the knowledge."""
+        return all(name in self.index for name in query.symbols())
+
+    def entails(self, query):
+        """Checks if every model of the knowledge base satisfies query."""
+        if query in self.answers:
+            return self.answers[query]
+
+        # Literals are read straight off the shared bit masks
+        if isinstance(query, Symbol):
+            result = bool(self.always >> self.index[query.name] & 1)
+        elif isinstance(query, Not) and isinstance(query.operand, Symbol):
+            i = self.index[query.operand.name]
+            result = not self.sometimes >> i & 1
+        else:
+            query_true = query.compile(self.symbols)
+            result = all(query_true(model) for model in self.models)
+
+        self.answers[query] = result
+        return result
+
+
+# Model sets of recently queried knowledge bases, keyed by id()
+model_sets = dict()
+
+
+def models_of(knowledge):
+    """
+    Returns the ModelSet of a knowledge base, reusing the cached one
+    while the same object is alive and has not been extended.
+    """
+    key = id(knowledge)
+
+    # And.add only ever appends, so the count of conjuncts tells whether
+    # the knowledge base has been extended, without rehashing all of it
+    size = len(knowledge.conjuncts) if isinstance(knowledge, And) else 0
+    entry = model_sets.get(key)
+    if entry is not None:
+        ref, state, model_set = entry
+        if ref() is knowledge and state == size:
+            return model_set
+
+    model_set = ModelSet(knowledge)
+    ref = weakref.ref(knowledge, lambda _: model_sets.pop(key, None))
+    model_sets[key] = (ref, size, model_set)
+    return model_set
+
+
+def model_check_many(knowledge, queries):
+    """
+    Checks if knowledge base entails each query.
+    Returns a list of booleans in the same order as queries.
+    """
+    model_set = models_of(knowledge)
+    return [
+        model_set.entails(query) if model_set.covers(query)
+        else model_check(knowledge, query)
+        for query in queries
+    ]
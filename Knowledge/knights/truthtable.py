@@ -0,0 +1,179 @@
+"""
+Vectorized truth-table entailment for logic.py sentences.
+
+Every symbol is represented as a packed bit-vector over all 2^n
+assignments of the n symbols, and connectives become bitwise NumPy
+operations. Evaluating the knowledge base once gives the full set of
+its models, after which any query is decided with a single AND/compare.
+"""
+
+import numpy as np
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# 2^28 assignments already take 32 MiB per vector
+MAX_SYMBOLS = 28
+
+WORD_BITS = 64
+
+# Bit patterns of the first six symbols within a single 64-bit word:
+# bit m of SMALL_PATTERNS[i] is bit i of m
+SMALL_PATTERNS = [
+    0xAAAAAAAAAAAAAAAA,
+    0xCCCCCCCCCCCCCCCC,
+    0xF0F0F0F0F0F0F0F0,
+    0xFF00FF00FF00FF00,
+    0xFFFF0000FFFF0000,
+    0xFFFFFFFF00000000,
+]
+
+
+class TruthTable():
+    """
+    The set of models of a knowledge base over a fixed list of symbols.
+    Assignment m gives symbols[i] the value of bit i of m.
+    """
+
+    def __init__(self, knowledge, symbols=None):
+        if symbols is None:
+            symbols = knowledge.symbols()
+        self.symbols = sorted(symbols)
+        if len(self.symbols) > MAX_SYMBOLS:
+            raise ValueError(
+                f"{len(self.symbols)} symbols exceeds limit of {MAX_SYMBOLS}"
+            )
+        self.index = {name: i for i, name in enumerate(self.symbols)}
+
+        size = 1 << len(self.symbols)
+        self.words = max(1, size // WORD_BITS)
+
+        # Bits beyond the last assignment when there are fewer than 64
+        self.valid = np.full(self.words, ~np.uint64(0), dtype="<u8")
+        if size < WORD_BITS:
+            self.valid[0] = np.uint64((1 << size) - 1)
+
+        self.cache = dict()
+        self.uses = dict()
+        self.models = self.evaluate(knowledge) & self.valid
+
+    def symbol_vector(self, name):
+        try:
+            i = self.index[name]
+        except KeyError:
+            raise Exception(f"variable {name} not in model")
+
+        if i < 6:
+            return np.full(self.words, SMALL_PATTERNS[i], dtype="<u8")
+
+        # Higher symbols switch whole words on and off in blocks
+        on = (np.arange(self.words) >> (i - 6)) & 1
+        return np.where(on == 1, ~np.uint64(0), np.uint64(0)).astype("<u8")
+
+    def evaluate(self, sentence):
+        """
+        Returns the packed bit-vector of assignments satisfying
+        `sentence`. Bits beyond the last assignment are unspecified.
+
+        Only subformulas with more than one parent are cached, and each
+        is dropped after its last parent has used it, so at most the
+        vectors still waiting to be reused are held at once.
+        """
+        self.uses = parent_counts(sentence)
+        try:
+            return self.vector(sentence)
+        finally:
+            self.cache = dict()
+            self.uses = dict()
+
+    def vector(self, sentence):
+        if sentence in self.cache:
+            self.uses[sentence] -= 1
+            if not self.uses[sentence]:
+                return self.cache.pop(sentence)
+            return self.cache[sentence]
+
+        if isinstance(sentence, Symbol):
+            result = self.symbol_vector(sentence.name)
+        elif isinstance(sentence, Not):
+            result = ~self.vector(sentence.operand)
+        elif isinstance(sentence, And):
+            result = np.full(self.words, ~np.uint64(0), dtype="<u8")
+            for conjunct in sentence.conjuncts:
+                result = result & self.vector(conjunct)
+        elif isinstance(sentence, Or):
+            result = np.zeros(self.words, dtype="<u8")
+            for disjunct in sentence.disjuncts:
+                result = result | self.vector(disjunct)
+        elif isinstance(sentence, Implication):
+            result = (~self.vector(sentence.antecedent)
+                      | self.vector(sentence.consequent))
+        elif isinstance(sentence, Biconditional):
+            result = ~(self.vector(sentence.left)
+                       ^ self.vector(sentence.right))
+        else:
+            raise TypeError(f"cannot evaluate {sentence!r}")
+
+        if sentence.is_interned() and self.uses.get(sentence, 0) > 1:
+            self.uses[sentence] -= 1
+            self.cache[sentence] = result
+        return result
+
+    def entails(self, query):
+        """Checks if every model of the knowledge base satisfies query."""
+        counter_models = self.models & ~self.evaluate(query)
+        return not counter_models.any()
+
+    def count(self):
+        """Returns the number of models of the knowledge base."""
+        return int(np.bitwise_count(self.models).sum())
+
+    def assignments(self):
+        """Returns the integers m of all models, in increasing order."""
+        bits = np.unpackbits(self.models.view(np.uint8), bitorder="little")
+        return np.flatnonzero(bits)
+
+    def satisfying_models(self):
+        """Yields every model of the knowledge base as a dict."""
+        for m in self.assignments():
+            m = int(m)
+            yield {
+                name: bool(m >> i & 1)
+                for i, name in enumerate(self.symbols)
+            }
+
+
+def operands(sentence):
+    """Returns the immediate subformulas of a sentence."""
+    if isinstance(sentence, Not):
+        return (sentence.operand,)
+    if isinstance(sentence, And):
+        return sentence.conjuncts
+    if isinstance(sentence, Or):
+        return sentence.disjuncts
+    if isinstance(sentence, Implication):
+        return (sentence.antecedent, sentence.consequent)
+    if isinstance(sentence, Biconditional):
+        return (sentence.left, sentence.right)
+    return ()
+
+
+def parent_counts(sentence):
+    """
+    Returns how many times each interned subformula of `sentence` is
+    an operand, counting every distinct parent once per occurrence.
+    """
+    counts = dict()
+    stack = [sentence]
+    while stack:
+        for operand in operands(stack.pop()):
+            if operand not in counts:
+                counts[operand] = 0
+                stack.append(operand)
+            counts[operand] += 1
+    return counts
+
+
+def truth_table_check(knowledge, query):
+    """Checks if knowledge base entails query, using bitwise truth tables."""
+    symbols = set.union(knowledge.symbols(), query.symbols())
+    return TruthTable(knowledge, symbols).entails(query)
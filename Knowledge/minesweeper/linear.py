@@ -0,0 +1,103 @@
+"""
+Linear-algebra inference for the Minesweeper AI.
+
+Every sentence is a linear equation over 0/1 unknowns: the sum of its
+cells equals its count. With the total number of mines left, the whole
+knowledge base is one sparse linear system. Reducing it with Gaussian
+elimination and checking each reduced row against the bounds its
+coefficients allow derives safe cells and mines that no single pair of
+sentences implies.
+"""
+
+import numpy as np
+
+# Tolerance for treating a floating point value as zero
+EPS = 1e-9
+
+
+def reduce(matrix):
+    """
+    Brings an augmented matrix [A | b] to reduced row echelon form with
+    partial pivoting. Returns the nonzero rows.
+    """
+    rows, cols = matrix.shape
+    r = 0
+    for c in range(cols - 1):
+        if r == rows:
+            break
+
+        pivot = r + int(np.argmax(np.abs(matrix[r:, c])))
+        if abs(matrix[pivot, c]) < EPS:
+            continue
+        if pivot != r:
+            matrix[[r, pivot]] = matrix[[pivot, r]]
+
+        # Eliminate the column from every other row in one step
+        matrix[r] /= matrix[r, c]
+        factors = matrix[:, c].copy()
+        factors[r] = 0
+        matrix -= np.outer(factors, matrix[r])
+        r += 1
+
+    matrix[np.abs(matrix) < EPS] = 0
+    return matrix[:r]
+
+
+def linear_deductions(sentences, unknown, mines_left=None):
+    """
+    Returns the sets (safes, mines) of cells whose values follow from
+    sentences, given as (cells, count) pairs over the unknown cells,
+    together with the number of mines left if known.
+    """
+    columns = dict()
+    for cells, _ in sentences:
+        for cell in cells:
+            columns.setdefault(cell, len(columns))
+    free = [cell for cell in unknown if cell not in columns]
+
+    # The cells in no sentence only appear in the mine total, so they
+    # share one column holding how many of them are mines
+    aggregate = mines_left is not None and bool(free)
+    width = len(columns) + aggregate
+    if not width:
+        return set(), set()
+
+    equations = len(sentences) + (mines_left is not None)
+    matrix = np.zeros((equations, width + 1))
+    for row, (cells, count) in enumerate(sentences):
+        matrix[row, [columns[cell] for cell in cells]] = 1
+        matrix[row, -1] = count
+    if mines_left is not None:
+        matrix[-1, :-1] = 1
+        matrix[-1, -1] = mines_left
+
+    upper = np.ones(width)
+    if aggregate:
+        upper[-1] = len(free)
+
+    reduced = reduce(matrix)
+    a, b = reduced[:, :-1], reduced[:, -1]
+
+    # Each row sums to b; with every column between 0 and its upper
+    # bound, its positive and negative coefficients bound what it can
+    # reach
+    positive = a > 0
+    negative = a < 0
+    highest = np.where(positive, a, 0) @ upper
+    lowest = np.where(negative, a, 0) @ upper
+
+    # At the upper bound every positive column is at its maximum and
+    # every negative one at zero; at the lower bound, the reverse
+    at_highest = (np.abs(b - highest) < 1e-6)[:, None]
+    at_lowest = (np.abs(b - lowest) < 1e-6)[:, None]
+    full = ((at_highest & positive) | (at_lowest & negative)).any(axis=0)
+    empty = ((at_highest & negative) | (at_lowest & positive)).any(axis=0)
+
+    cells = list(columns)
+    mines = {cells[c] for c in np.nonzero(full[:len(cells)])[0]}
+    safes = {cells[c] for c in np.nonzero(empty[:len(cells)])[0]}
+    if aggregate and full[-1]:
+        mines.update(free)
+    if aggregate and empty[-1]:
+        safes.update(free)
+    return safes, mines
@@ -1,6 +1,28 @@
 import itertools
 import random
+from collections import deque
 from copy import deepcopy
+from functools import lru_cache
+
+import numpy as np
+
+from linear import linear_deductions
+from probability import mine_probabilities
+
+def neighbour_counts(board):
+    """
+    Returns the number of mines next to every cell of a boolean board,
+    as a 3x3 convolution done with shifted slices.
+    """
+    height, width = board.shape
+    padded = np.pad(board.astype(np.int8), 1)
+    counts = np.zeros((height, width), dtype=np.int8)
+    for di in range(3):
+        for dj in range(3):
+            if (di, dj) != (1, 1):
+                counts += padded[di:di + height, dj:dj + width]
+    return counts
+
 
 class Minesweeper():
     """
@@ -15,20 +37,18 @@ class Minesweeper():
         self.mines = set()
 
         # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+        self.board = np.zeros((height, width), dtype=bool)
 
         # Add mines randomly
         while len(self.mines) != mines:
             i = random.randrange(height)
             j = random.randrange(width)
-            if not self.board[i][j]:
+            if not self.board[i, j]:
                 self.mines.add((i, j))
-                self.board[i][j] = True
+                self.board[i, j] = True
+
+        # Count every cell's neighbouring mines once, up front
+        self.counts = neighbour_counts(self.board)
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -49,8 +69,7 @@ class Minesweeper():
         print("--" * self.width + "-")
 
     def is_mine(self, cell):
-        i, j = cell
-        return self.board[i][j]
+        return bool(self.board[cell])
 
     def nearby_mines(self, cell):
         """
@@ -58,24 +77,7 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
-
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        return int(self.counts[cell])
 
     def won(self):
         """
@@ -98,6 +100,11 @@ class Sentence():
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    # Sentences hash by value, so a sentence must be taken out of any
+    # set or dict before its cells or count change
+    def __hash__(self):
+        return hash((frozenset(self.cells), self.count))
+
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
@@ -140,17 +147,115 @@ class Sentence():
         return True
 
 
+def bits(mask):
+    """
+    Yields the positions of the set bits of mask, lowest first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+@lru_cache(maxsize=None)
+def neighbour_masks(height, width):
+    """
+    Returns a tuple holding, for every bit position i * width + j of a
+    height x width board, the mask of the neighbours of cell (i, j).
+    """
+    masks = []
+    for row in range(height):
+        for col in range(width):
+            mask = 0
+            for i in range(max(row - 1, 0), min(row + 2, height)):
+                for j in range(max(col - 1, 0), min(col + 2, width)):
+                    if (i, j) != (row, col):
+                        mask |= 1 << (i * width + j)
+            masks.append(mask)
+    return tuple(masks)
+
+
+class BitSentence():
+    """
+    Immutable logical statement about a Minesweeper game.
+    The cells are the set bits of an integer mask, with cell (i, j)
+    at bit i * width + j, so subset tests and differences are single
+    integer operations.
+    """
+
+    __slots__ = ("mask", "count")
+
+    def __init__(self, mask, count):
+        self.mask = mask
+        self.count = count
+
+    def __eq__(self, other):
+        return self.mask == other.mask and self.count == other.count
+
+    def __hash__(self):
+        return hash((self.mask, self.count))
+
+    def __str__(self):
+        return f"{bin(self.mask)} = {self.count}"
+
+    def known_mines(self):
+        """
+        Returns the mask of all cells known to be mines.
+        """
+        if self.mask.bit_count() == self.count:
+            return self.mask
+        return 0
+
+    def known_safes(self):
+        """
+        Returns the mask of all cells known to be safe.
+        """
+        if self.count == 0:
+            return self.mask
+        return 0
+
+    def without_mine(self, bit):
+        """
+        Returns the sentence left once the cell at `bit` is a known mine.
+        """
+        if self.mask & bit:
+            return BitSentence(self.mask & ~bit, self.count - 1)
+        return self
+
+    def without_safe(self, bit):
+        """
+        Returns the sentence left once the cell at `bit` is known safe.
+        """
+        return BitSentence(self.mask & ~bit, self.count)
+
+    def issubset(self, other):
+        return self.mask & ~other.mask == 0
+
+    def difference(self, other):
+        """
+        Returns the sentence about the cells of self not in other,
+        given that other's cells are a subset of self's.
+        """
+        return BitSentence(self.mask & ~other.mask, self.count - other.count)
+
+
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, if known
+        self.mine_count = mines
+
+        # Seconds make_random_move may spend computing mine probabilities
+        self.time_limit = 0.1
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -158,8 +263,74 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # The same cells as bitmasks, with cell (i, j) at bit i * width + j
+        self.moves_mask = 0
+        self.known_mask = 0
+        self.mine_mask = 0
+
+        # Mask of the neighbours of every cell, by bit position
+        self.neighbours = neighbour_masks(height, width)
+
+        # Set of sentences about the game known to be true
+        self.knowledge = set()
+
+        # Map from each bit position to the sentences containing it
+        self.index = dict()
+
+        # Sentences added or changed since inference last looked at them
+        self.pending = deque()
+
+    def position(self, cell):
+        return cell[0] * self.width + cell[1]
+
+    def cell(self, pos):
+        return divmod(pos, self.width)
+
+    def sentences(self):
+        """
+        Returns the knowledge base as a list of Sentence objects.
+        """
+        return [
+            Sentence({self.cell(pos) for pos in bits(sentence.mask)},
+                     sentence.count)
+            for sentence in self.knowledge
+        ]
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base and the cell index.
+        Returns False, adding nothing, if the sentence has no cells
+        or is already known.
+        """
+        if not sentence.mask or sentence in self.knowledge:
+            return False
+
+        self.knowledge.add(sentence)
+        for pos in bits(sentence.mask):
+            self.index.setdefault(pos, set()).add(sentence)
+        self.pending.append(sentence)
+        return True
+
+    def remove_sentence(self, sentence):
+        """
+        Removes a sentence from the knowledge base and the cell index.
+        """
+        self.knowledge.discard(sentence)
+        for pos in bits(sentence.mask):
+            sentences = self.index.get(pos)
+            if sentences is not None:
+                sentences.discard(sentence)
+                if not sentences:
+                    del self.index[pos]
+
+    def overlapping(self, sentence):
+        """
+        Returns the set of known sentences sharing a cell with sentence.
+        """
+        sentences = set()
+        for pos in bits(sentence.mask):
+            sentences.update(self.index.get(pos, ()))
+        return sentences
 
     def mark_mine(self, cell):
         """
@@ -167,8 +338,13 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        pos = self.position(cell)
+        bit = 1 << pos
+        self.known_mask |= bit
+        self.mine_mask |= bit
+        for sentence in self.index.pop(pos, ()):
+            self.remove_sentence(sentence)
+            self.add_sentence(sentence.without_mine(bit))
 
     def mark_safe(self, cell):
         """
@@ -176,8 +352,12 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        pos = self.position(cell)
+        bit = 1 << pos
+        self.known_mask |= bit
+        for sentence in self.index.pop(pos, ()):
+            self.remove_sentence(sentence)
+            self.add_sentence(sentence.without_safe(bit))
 
     def add_knowledge(self, cell, count):
         """
@@ -196,83 +376,106 @@ class MinesweeperAI():
         """
 
         self.moves_made.add(cell)
+        self.moves_mask |= 1 << self.position(cell)
         self.mark_safe(cell)
-        
-        neighbours = self.find_neighbours(cell)
-        if not neighbours:
-            return
-
-        sentence = Sentence(neighbours, count)
-        self.knowledge.append(sentence)
-
-        for each_cell in sentence.cells.copy():
-            if each_cell in self.safes:
-                sentence.mark_safe(each_cell)
-            elif each_cell in self.mines:
-                sentence.mark_mine(each_cell)
-
-        if sentence.known_safes():
-            for each_cell in sentence.cells.copy():
-                self.mark_safe(each_cell)
-
-        elif sentence.known_mines():
-            for each_cell in sentence.cells.copy():
-                self.mark_mine(each_cell)
-
-        for line in self.knowledge.copy():
-            if line == sentence or sentence.is_empty() or line.is_empty():
-                continue
 
-            elif line.cells.issubset(sentence.cells):
-                self.knowledge.append(Sentence(
-                                    sentence.cells - line.cells,
-                                    sentence.count - line.count
-                                    ))
+        # Leave out known cells, discounting the known mines
+        neighbours = self.neighbours[self.position(cell)]
+        count -= (neighbours & self.mine_mask).bit_count()
+        self.add_sentence(BitSentence(neighbours & ~self.known_mask, count))
 
-            elif sentence.cells.issubset(line.cells):
-                self.knowledge.append(Sentence(
-                                    line.cells - sentence.cells,
-                                    line.count - sentence.count
-                                    ))
+        self.propagate()
 
-        self.mark_additional_cells()
-        self.clean_knowledge()
+        # Solving all sentences together finds what pairs of them miss,
+        # which is only worth doing once they run out of safe moves
+        while not self.safes - self.moves_made and self.linear_inference():
+            self.propagate()
 
-    def mark_additional_cells(self):
-        for line in self.knowledge:
-            if line.is_empty():
+    def propagate(self):
+        """
+        Draws every available inference from the knowledge base.
+
+        Sentences are taken from the `pending` worklist, which every
+        new or changed sentence joins. A sentence whose cells are all
+        safe or all mines marks them, which puts the sentences sharing
+        those cells back on the worklist. Any other sentence is compared
+        only with the sentences overlapping it, and the differences of
+        subsets join the knowledge base. This stops once nothing changes.
+        """
+        while self.pending:
+            sentence = self.pending.popleft()
+
+            # Skip sentences replaced since they were queued
+            if sentence not in self.knowledge:
                 continue
 
-            if line.known_safes():
-                for each_cell in line.cells.copy():
-                    self.mark_safe(each_cell)
-                self.mark_additional_cells()
+            if sentence.known_safes():
+                for pos in bits(sentence.mask):
+                    self.mark_safe(self.cell(pos))
+                continue
 
-            elif line.known_mines():
-                for each_cell in line.cells.copy():
-                    self.mark_mine(each_cell)
-                self.mark_additional_cells()
+            if sentence.known_mines():
+                for pos in bits(sentence.mask):
+                    self.mark_mine(self.cell(pos))
+                continue
 
-    def clean_knowledge(self):
-        for line in self.knowledge.copy():
-            if line.is_empty():
-                self.knowledge.remove(line)
+            for line in self.overlapping(sentence):
+                if line.mask == sentence.mask:
+                    continue
+
+                elif line.issubset(sentence):
+                    self.add_sentence(sentence.difference(line))
 
+                elif sentence.issubset(line):
+                    self.add_sentence(line.difference(sentence))
+
+    def linear_inference(self):
+        """
+        Marks every cell whose value follows from the knowledge base
+        and the number of mines left, read as one linear system.
+        Returns True if any cell was marked.
+        """
+        unknown = self.unknown_mask()
+        if not unknown:
+            return False
+
+        safes, mines = linear_deductions(
+            self.constraints(), list(bits(unknown)), self.mines_left()
+        )
+        for pos in safes:
+            self.mark_safe(self.cell(pos))
+        for pos in mines:
+            self.mark_mine(self.cell(pos))
+        return bool(safes or mines)
+
+    def constraints(self):
+        """
+        Returns the knowledge base as (bit positions, count) pairs.
+        """
+        return [(list(bits(sentence.mask)), sentence.count)
+                for sentence in self.knowledge]
+
+    def unknown_mask(self):
+        """
+        Returns the mask of cells not yet known to be safe or mines.
+        """
+        everything = (1 << (self.height * self.width)) - 1
+        return everything & ~self.known_mask
+
+    def mines_left(self):
+        """
+        Returns the number of mines not yet found, or None if the
+        total number of mines is unknown.
+        """
+        if self.mine_count is None:
+            return None
+        return self.mine_count - len(self.mines)
 
     def find_neighbours(self, cell):
         # find all neighbours of a cell: up, down, left, right and diagonally.
         # 8 possible neighbours for a cell not touching the wall.
-        neighbours = set()
-
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-                if (i,j) == cell:
-                    continue
-
-                if 0 <= i < self.height and 0 <= j < self.width\
-                and (i,j) not in self.moves_made:
-                    neighbours.add((i,j))
-        return neighbours
+        mask = self.neighbours[self.position(cell)] & ~self.moves_mask
+        return {self.cell(pos) for pos in bits(mask)}
 
     def make_safe_move(self):
         """
@@ -291,15 +494,20 @@ class MinesweeperAI():
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
-        Should choose randomly among cells that:
+        Should choose among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        picking at random among those least likely to be a mine.
         """
-        if len(self.moves_made.union(self.mines)) >= self.height*self.width:
+        unknown = self.unknown_mask()
+        if not unknown:
             return None
 
-        for num in random.sample(range(self.height**2 - 1), self.height**2 - 1):
-            row, col = divmod(num, self.height)
-            if (row, col) not in self.moves_made\
-            and (row, col) not in self.mines:
-                return (row, col)
+        probabilities = mine_probabilities(
+            self.constraints(), list(bits(unknown)),
+            self.mines_left(), self.time_limit
+        )
+
+        lowest = min(probabilities.values())
+        choices = [pos for pos, p in probabilities.items() if p <= lowest]
+        return self.cell(random.choice(choices))
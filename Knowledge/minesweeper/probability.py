@@ -0,0 +1,312 @@
+"""
+Mine probabilities for the Minesweeper AI.
+
+The constrained cells are split into components that share no
+sentence. Each component's consistent mine assignments are counted by
+memoized backtracking, grouped by how many mines they use. The
+components are then combined, with every total weighted by the number
+of ways the remaining mines fit into the unconstrained cells.
+Components too large to enumerate, or whose share of the time limit
+runs out, are estimated by sampling instead. The time limit is a hard
+deadline split between the components.
+"""
+
+import math
+import random
+import time
+
+import numpy as np
+
+# Components with more cells than this are sampled, not enumerated
+MAX_EXACT_CELLS = 48
+
+# Number of random consistent assignments drawn per sampled component
+SAMPLES = 200
+
+# Share of the time limit kept for combining the component tables
+COMBINE_SHARE = 0.25
+
+
+class Timeout(Exception):
+    pass
+
+
+def components(sentences):
+    """
+    Splits sentences, given as (cells, count) pairs, into groups that
+    share no cells. Returns a list of (cells, sentences) pairs, with the
+    cells ordered so that each sentence's cells come close together.
+    """
+    parent = dict()
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for cells, _ in sentences:
+        for cell in cells:
+            parent.setdefault(cell, cell)
+        for cell in cells[1:]:
+            parent[find(cell)] = find(cells[0])
+
+    groups = dict()
+    for sentence in sentences:
+        groups.setdefault(find(sentence[0][0]), []).append(sentence)
+
+    result = []
+    for group in groups.values():
+        order = dict()
+        for cells, _ in group:
+            for cell in cells:
+                order.setdefault(cell, len(order))
+        result.append((list(order), group))
+    return result
+
+
+def constraints_by_cell(cells, sentences):
+    """
+    Returns, for every cell index k, the list of (sentence index,
+    cells of that sentence after k) pairs for sentences containing it.
+    """
+    index = {cell: k for k, cell in enumerate(cells)}
+    touching = [[] for _ in cells]
+    for s, (members, _) in enumerate(sentences):
+        ranks = sorted(index[cell] for cell in members)
+        for rank, k in enumerate(ranks):
+            touching[k].append((s, len(ranks) - rank - 1))
+    return touching
+
+
+def enumerate_component(cells, sentences, deadline):
+    """
+    Counts the mine assignments to `cells` consistent with `sentences`.
+    Returns a dict mapping a number of mines m to (ways, counts), where
+    ways is the number of consistent assignments with m mines and
+    counts[k] is how many of them put a mine on cells[k].
+    """
+    n = len(cells)
+    touching = constraints_by_cell(cells, sentences)
+    memo = dict()
+
+    # The remaining counts of every sentence after the first k cells
+    # are assigned fully determine the rest of the search
+    def solve(k, need):
+        if k == n:
+            return {0: (1, ())}
+        key = (k, need)
+        if key in memo:
+            return memo[key]
+        if time.monotonic() > deadline:
+            raise Timeout
+
+        table = dict()
+        for value in (0, 1):
+            remaining = list(need)
+            for s, after in touching[k]:
+                remaining[s] -= value
+                if not 0 <= remaining[s] <= after:
+                    break
+            else:
+                for m, (ways, counts) in solve(k + 1, tuple(remaining)).items():
+                    entry = table.setdefault(m + value, [0, [0] * (n - k)])
+                    entry[0] += ways
+                    entry[1][0] += ways * value
+                    for t, count in enumerate(counts, 1):
+                        entry[1][t] += count
+
+        memo[key] = {
+            m: (ways, tuple(counts)) for m, (ways, counts) in table.items()
+        }
+        return memo[key]
+
+    return solve(0, tuple(count for _, count in sentences))
+
+
+def sample_component(cells, sentences, deadline, rng):
+    """
+    Estimates enumerate_component by drawing random consistent
+    assignments, each counted as one way. Stops at SAMPLES draws or at
+    the deadline, whichever comes first.
+    """
+    n = len(cells)
+    touching = constraints_by_cell(cells, sentences)
+    table = dict()
+
+    def search(k, need, assignment):
+        if k == n:
+            return True
+        if time.monotonic() > deadline:
+            raise Timeout
+
+        values = [0, 1]
+        rng.shuffle(values)
+        for value in values:
+            remaining = list(need)
+            for s, after in touching[k]:
+                remaining[s] -= value
+                if not 0 <= remaining[s] <= after:
+                    break
+            else:
+                assignment.append(value)
+                if search(k + 1, remaining, assignment):
+                    return True
+                assignment.pop()
+        return False
+
+    for _ in range(SAMPLES):
+        assignment = []
+        try:
+            if not search(0, [count for _, count in sentences], assignment):
+                break
+        except Timeout:
+            break
+
+        entry = table.setdefault(sum(assignment), [0, [0] * n])
+        entry[0] += 1
+        for k, value in enumerate(assignment):
+            entry[1][k] += value
+
+    return {m: (ways, tuple(counts)) for m, (ways, counts) in table.items()}
+
+
+def table_arrays(table, n):
+    """
+    Returns a component table as arrays indexed by number of mines: the
+    ways to place that many mines and the counts for each of the n
+    cells, both scaled so that the largest number of ways is 1. Only
+    ratios between assignments matter, so scaling every table keeps
+    the floating point products across components in range.
+    """
+    ways = np.zeros(max(table) + 1)
+    counts = np.zeros((max(table) + 1, n))
+    for m, (w, c) in table.items():
+        ways[m] = w
+        counts[m] = c
+    scale = ways.max()
+    return ways / scale, counts / scale
+
+
+def running_totals(ways):
+    """
+    Returns a list whose entry i holds the ways to split each total
+    number of mines across the first i components.
+    """
+    totals = [np.ones(1)]
+    for w in ways:
+        totals.append(np.convolve(totals[-1], w))
+    return totals
+
+
+def free_weights(size, free, mines_left):
+    """
+    Returns, for every number m of mines in the constrained cells up to
+    size - 1, the ways to place the other mines among `free`
+    unconstrained cells, relative to the largest of them.
+    """
+    if mines_left is None:
+        return np.ones(size)
+
+    logs = np.full(size, -np.inf)
+    for m in range(size):
+        rest = mines_left - m
+        if 0 <= rest <= free:
+            logs[m] = (math.lgamma(free + 1) - math.lgamma(rest + 1)
+                       - math.lgamma(free - rest + 1))
+    if np.isneginf(logs).all():
+        return np.zeros(size)
+    return np.exp(logs - logs.max())
+
+
+def time_share(deadline, parts):
+    """
+    Returns the deadline for the first of `parts` equal shares of the
+    time left before `deadline`.
+    """
+    now = time.monotonic()
+    return now + max(0, deadline - now) / parts
+
+
+def mine_probabilities(sentences, unknown, mines_left=None,
+                       time_limit=0.1, rng=None):
+    """
+    Returns a dict mapping every cell in `unknown` to the probability
+    that it is a mine, given sentences as (cells, count) pairs over
+    unknown cells. If `mines_left` is None, components are treated as
+    independent and unconstrained cells get the average probability of
+    the constrained ones.
+    """
+    rng = rng or random
+
+    # Counting stops early enough to leave time for combining the tables
+    deadline = time.monotonic() + time_limit * (1 - COMBINE_SHARE)
+
+    # Small components first, since they are usually quick to enumerate;
+    # each gets an equal share of the time the ones before it left over
+    groups = sorted(components(sentences), key=lambda group: len(group[0]))
+    solved = []
+    tables = []
+    for i, (cells, group) in enumerate(groups):
+        table = None
+        if len(cells) <= MAX_EXACT_CELLS:
+            try:
+                table = enumerate_component(
+                    cells, group, time_share(deadline, len(groups) - i)
+                )
+            except Timeout:
+                pass
+        if table is None:
+            table = sample_component(
+                cells, group, time_share(deadline, len(groups) - i), rng
+            )
+
+        # A component with no samples says nothing about its cells,
+        # which are then treated as unconstrained
+        if table:
+            solved.append((cells, group))
+            tables.append(table)
+    groups = solved
+
+    constrained = {cell for cells, _ in groups for cell in cells}
+    free = [cell for cell in unknown if cell not in constrained]
+    u = len(free)
+
+    arrays = [table_arrays(table, len(cells))
+              for (cells, _), table in zip(groups, tables)]
+    ways = [w for w, _ in arrays]
+
+    # Totals over the components before and after each one
+    before = running_totals(ways)
+    after = running_totals(ways[::-1])[::-1]
+    totals = before[-1]
+
+    weights = free_weights(len(totals), u, mines_left)
+    z = totals @ weights
+    if not z:
+        # Sampling missed every assignment matching the mine count
+        mines_left = None
+        weights = free_weights(len(totals), u, None)
+        z = totals @ weights
+
+    probabilities = dict()
+    for i, ((cells, _), (_, counts)) in enumerate(zip(groups, arrays)):
+        others = np.convolve(before[i], after[i + 1])
+
+        # share[m]: weight of every completion of m mines in this component
+        share = np.correlate(weights, others, mode="valid")[:len(counts)]
+        for cell, p in zip(cells, counts.T @ share / z):
+            probabilities[cell] = float(p)
+
+    if free:
+        if mines_left is not None:
+            expected = totals * weights @ (mines_left - np.arange(len(totals)))
+            p = float(expected / (z * u))
+        elif constrained:
+            p = sum(probabilities[c] for c in constrained) / len(constrained)
+        else:
+            p = 0.5
+        for cell in free:
+            probabilities[cell] = p
+
+    return probabilities
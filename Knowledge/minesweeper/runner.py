@@ -1,6 +1,7 @@
 import pygame
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from minesweeper import Minesweeper, MinesweeperAI
 
@@ -37,9 +38,32 @@ flag = pygame.transform.scale(flag, (cell_size, cell_size))
 mine = pygame.image.load("assets/images/mine.png")
 mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
+
+def choose_ai_move(ai):
+    """
+    Picks the AI's next move, returning the move and a status message.
+    Runs on the AI worker so inference never blocks the render loop.
+    """
+    move = ai.make_safe_move()
+    if move is not None:
+        return move, "AI making safe move."
+    move = ai.make_random_move()
+    if move is None:
+        return None, "No moves left to make."
+    return move, "No known safe moves, AI making random move."
+
+
+# A single worker runs all AI calls in submission order, so knowledge
+# updates and move choices never interleave
+executor = ThreadPoolExecutor(max_workers=1)
+
 # Create game and AI agent
 game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
+ai_future = None
+
+# Knowledge updates still running on the worker, checked for errors
+knowledge_futures = []
 
 # Keep track of revealed cells, flagged cells, and if a mine was hit
 revealed = set()
@@ -54,6 +78,7 @@ while True:
     # Check if game quit
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            executor.shutdown(wait=False, cancel_futures=True)
             sys.exit()
 
     screen.fill(BLACK)
@@ -154,6 +179,8 @@ while True:
 
     # Display text
     text = "Lost" if lost else "Won" if game.mines == flags else ""
+    if ai_future is not None and not text:
+        text = "Thinking..."
     text = mediumFont.render(text, True, WHITE)
     textRect = text.get_rect()
     textRect.center = ((5 / 6) * width, (2 / 3) * height)
@@ -161,6 +188,20 @@ while True:
 
     move = None
 
+    # Re-raise any error from a finished knowledge update, just as the
+    # update would have raised had it run on this thread
+    for future in [f for f in knowledge_futures if f.done()]:
+        knowledge_futures.remove(future)
+        future.result()
+
+    # Collect the AI move once the worker has finished computing it
+    if ai_future is not None and ai_future.done():
+        move, message = ai_future.result()
+        ai_future = None
+        print(message)
+        if move is None:
+            flags = ai.mines.copy()
+
     left, _, right = pygame.mouse.get_pressed()
 
     # Check for a right-click to toggle flagging
@@ -178,31 +219,29 @@ while True:
     elif left == 1:
         mouse = pygame.mouse.get_pos()
 
-        # If AI button clicked, make an AI move
+        # If AI button clicked, ask the worker for an AI move
         if aiButton.collidepoint(mouse) and not lost:
-            move = ai.make_safe_move()
-            if move is None:
-                move = ai.make_random_move()
-                if move is None:
-                    flags = ai.mines.copy()
-                    print("No moves left to make.")
-                else:
-                    print("No known safe moves, AI making random move.")
-            else:
-                print("AI making safe move.")
+            if ai_future is None:
+                ai_future = executor.submit(choose_ai_move, ai)
             time.sleep(0.2)
 
-        # Reset game state
+        # Reset game state, discarding any AI work for the old game.
+        # A running move can't be interrupted, so it is left to finish
+        # on the old executor, with anything queued behind it cancelled
         elif resetButton.collidepoint(mouse):
+            executor.shutdown(wait=False, cancel_futures=True)
+            executor = ThreadPoolExecutor(max_workers=1)
+            ai_future = None
+            knowledge_futures = []
             game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+            ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
             revealed = set()
             flags = set()
             lost = False
             continue
 
-        # User-made move
-        elif not lost:
+        # User-made move, ignored while the AI is still choosing
+        elif not lost and ai_future is None:
             for i in range(HEIGHT):
                 for j in range(WIDTH):
                     if (cells[i][j].collidepoint(mouse)
@@ -217,6 +256,8 @@ while True:
         else:
             nearby = game.nearby_mines(move)
             revealed.add(move)
-            ai.add_knowledge(move, nearby)
+            knowledge_futures.append(
+                executor.submit(ai.add_knowledge, move, nearby)
+            )
 
     pygame.display.flip()
@@ -0,0 +1,137 @@
+"""
+Headless Minesweeper simulator.
+
+Plays many seeded games of MinesweeperAI against Minesweeper without
+pygame, spread over a process pool, and reports the win rate, moves
+per game, per-move latency and knowledge base size. Game i uses seed
+seed + i, so any game can be replayed on its own.
+
+Usage: python simulate.py [games] [height] [width] [mines] [seed] [processes]
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+GAMES = 1000
+HEIGHT = 8
+WIDTH = 8
+MINES = 8
+
+
+class GameResult():
+    """
+    Outcome of one simulated game: whether the AI won, the number of
+    cells it revealed, the seconds each move took and the size of the
+    knowledge base after each move.
+    """
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.won = False
+        self.moves = 0
+        self.latencies = []
+        self.knowledge_sizes = []
+
+
+def play_game(height, width, mines, seed):
+    """
+    Plays one game with every random choice drawn from `seed`.
+    Returns its GameResult.
+    """
+
+    # Both the board and the AI's guesses use the module-level generator
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines)
+    result = GameResult(seed)
+    safe_cells = height * width - mines
+
+    while result.moves < safe_cells:
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+        if move is None:
+            break
+        if game.is_mine(move):
+            result.latencies.append(time.perf_counter() - start)
+            return result
+
+        ai.add_knowledge(move, game.nearby_mines(move))
+        result.latencies.append(time.perf_counter() - start)
+        result.knowledge_sizes.append(len(ai.knowledge))
+        result.moves += 1
+
+    result.won = True
+    return result
+
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile of values, by nearest rank.
+    """
+    ordered = sorted(values)
+    rank = max(1, -(-p * len(ordered) // 100))
+    return ordered[rank - 1]
+
+
+def simulate(games, height, width, mines, seed=0, processes=None):
+    """
+    Plays `games` games across `processes` worker processes.
+    Returns their GameResults in seed order.
+    """
+    seeds = range(seed, seed + games)
+    if processes == 1:
+        return [play_game(height, width, mines, s) for s in seeds]
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(
+            play_game,
+            [height] * games, [width] * games, [mines] * games, seeds,
+            chunksize=max(1, games // (4 * (processes or os.cpu_count()))),
+        ))
+
+
+def report(results, seconds):
+    wins = sum(result.won for result in results)
+    latencies = [t for result in results for t in result.latencies]
+    sizes = [n for result in results for n in result.knowledge_sizes]
+
+    print(f"Games:           {len(results)} in {seconds:.2f}s")
+    print(f"Win rate:        {wins / len(results):.1%} ({wins} won)")
+    print(f"Moves per game:  "
+          f"{statistics.mean(result.moves for result in results):.1f}")
+    if latencies:
+        print(f"Move latency:    "
+              f"p50={percentile(latencies, 50) * 1000:.3f}ms "
+              f"p99={percentile(latencies, 99) * 1000:.3f}ms "
+              f"max={max(latencies) * 1000:.3f}ms")
+    if sizes:
+        print(f"Knowledge size:  mean={statistics.mean(sizes):.1f} "
+              f"max={max(sizes)} sentences")
+
+
+def main():
+    if len(sys.argv) > 7:
+        sys.exit("Usage: python simulate.py "
+                 "[games] [height] [width] [mines] [seed] [processes]")
+    args = [int(arg) for arg in sys.argv[1:]]
+    games, height, width, mines, seed, processes = (
+        args + [GAMES, HEIGHT, WIDTH, MINES, 0, None][len(args):]
+    )
+    if not 0 <= mines < height * width:
+        sys.exit("There must be fewer mines than cells.")
+
+    start = time.perf_counter()
+    results = simulate(games, height, width, mines, seed, processes)
+    report(results, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
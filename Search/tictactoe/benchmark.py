@@ -0,0 +1,170 @@
+"""
+Benchmark for the Tic Tac Toe search engines.
+
+Runs every engine over a fixed suite of positions, counting nodes
+visited, alpha-beta cutoffs and cache hits, and reports nodes/sec and
+speedup relative to the unpruned search in exp.py.
+
+Usage: python benchmark.py [repeats]
+"""
+
+import sys
+import time
+
+import exp
+import tictactoe as ttt
+
+X = ttt.X
+O = ttt.O
+EMPTY = ttt.EMPTY
+
+
+class SearchStats():
+    """
+    Counters filled in by an instrumented search.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.cutoffs = 0
+        self.cache_hits = 0
+        self.seconds = 0.0
+
+    def add(self, other):
+        self.nodes += other.nodes
+        self.cutoffs += other.cutoffs
+        self.cache_hits += other.cache_hits
+        self.seconds += other.seconds
+
+    def nodes_per_second(self):
+        if not self.seconds:
+            return 0.0
+        return self.nodes / self.seconds
+
+
+def timed(engine, board):
+    """
+    Runs `engine` on `board` once.
+    Returns the chosen move and the SearchStats of the call.
+    """
+    stats = SearchStats()
+    start = time.perf_counter()
+    move = engine(board, stats)
+    stats.seconds = time.perf_counter() - start
+    return move, stats
+
+
+def memoized_minimax(board, stats=None):
+    """
+    Returns the optimal action for the current player on the board,
+    using plain minimax with a transposition table keyed on the board.
+
+    If `stats` is given, `nodes` counts positions searched and
+    `cache_hits` counts positions answered from the table.
+    """
+    cache = {}
+
+    def value(state):
+        key = tuple(tuple(row) for row in state)
+        if key in cache:
+            if stats is not None:
+                stats.cache_hits += 1
+            return cache[key]
+
+        if stats is not None:
+            stats.nodes += 1
+
+        if ttt.terminal(state):
+            v = ttt.utility(state)
+        else:
+            values = [value(ttt.result(state, action))
+                      for action in ttt.actions(state)]
+            v = max(values) if ttt.player(state) == X else min(values)
+
+        cache[key] = v
+        return v
+
+    if ttt.terminal(board):
+        return None
+
+    moves = sorted(ttt.actions(board))
+    best = max if ttt.player(board) == X else min
+    return best(moves, key=lambda action: value(ttt.result(board, action)))
+
+
+ENGINES = [
+    ("exp.minimax", exp.minimax),
+    ("tictactoe.minimax", ttt.minimax),
+    ("memoized_minimax", memoized_minimax),
+]
+
+
+def positions():
+    """
+    Returns the fixed suite of (name, board) positions to search.
+    """
+    suite = [("empty", ttt.initial_state())]
+
+    for name, moves in [
+        ("corner", [(0, 0)]),
+        ("center", [(1, 1)]),
+        ("edge", [(0, 1)]),
+        ("corner-center", [(0, 0), (1, 1)]),
+        ("opposite-corners", [(0, 0), (1, 1), (2, 2)]),
+        ("fork-threat", [(0, 0), (0, 1), (2, 2), (1, 1)]),
+        ("midgame", [(1, 1), (0, 0), (2, 0), (0, 2), (0, 1)]),
+    ]:
+        board = ttt.initial_state()
+        for move in moves:
+            board = ttt.result(board, move)
+        suite.append((name, board))
+
+    return suite
+
+
+def run(repeats=1):
+    """
+    Searches every position with every engine `repeats` times.
+    Returns a dict mapping engine name to its accumulated SearchStats.
+    """
+    totals = {name: SearchStats() for name, _ in ENGINES}
+
+    for position, board in positions():
+        print(f"{position}:")
+        for name, engine in ENGINES:
+            total = SearchStats()
+            for _ in range(repeats):
+                move, stats = timed(engine, board)
+                total.add(stats)
+            totals[name].add(total)
+            print(f"  {name:<20} move={move} nodes={total.nodes} "
+                  f"cutoffs={total.cutoffs} hits={total.cache_hits} "
+                  f"time={total.seconds:.4f}s")
+
+    return totals
+
+
+def report(totals):
+    """
+    Prints nodes/sec for each engine and its speedup over the first.
+    """
+    baseline = totals[ENGINES[0][0]].seconds
+
+    print("Totals:")
+    for name, _ in ENGINES:
+        stats = totals[name]
+        speedup = baseline / stats.seconds if stats.seconds else float("inf")
+        print(f"  {name:<20} nodes={stats.nodes} "
+              f"nodes/sec={stats.nodes_per_second():,.0f} "
+              f"time={stats.seconds:.4f}s speedup={speedup:.1f}x")
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [repeats]")
+    repeats = int(sys.argv[1]) if len(sys.argv) == 2 else 1
+    report(run(repeats))
+
+
+if __name__ == "__main__":
+    main()
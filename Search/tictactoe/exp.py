@@ -77,13 +77,19 @@ def winner(board):
 
     # return straight_lines() or diagonals() or None
 
-def minimax(board):
+def minimax(board, stats=None):
     """
     Returns the optimal action for the current player on the board.
+
+    If `stats` is given, its `nodes` counter is incremented for every
+    position visited. This search never prunes.
     """
 
     def max_value(state, depth=0):
 
+        if stats is not None:
+            stats.nodes += 1
+
         if ttt.terminal(state):
             return (None, ttt.utility(state))
 
@@ -95,6 +101,9 @@ def minimax(board):
 
     def min_value(state, depth=0):
 
+        if stats is not None:
+            stats.nodes += 1
+
         if ttt.terminal(state):
             return (None, ttt.utility(state))
 
@@ -1,6 +1,7 @@
 import pygame
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import tictactoe as ttt
 
@@ -17,14 +18,22 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+# Minimum time the computer appears to think before playing, in seconds
+AI_DELAY = 0.5
+
+# Search runs on a background worker so the window keeps redrawing
+executor = ThreadPoolExecutor(max_workers=1)
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
+ai_future = None
+ai_started = None
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            executor.shutdown(wait=False, cancel_futures=True)
             sys.exit()
 
     screen.fill(black)
@@ -108,15 +117,16 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, polling the worker instead of waiting on it
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
+            if ai_future is None:
+                ai_future = executor.submit(ttt.minimax, board)
+                ai_started = time.monotonic()
+            elif (ai_future.done()
+                  and time.monotonic() - ai_started >= AI_DELAY):
+                move = ai_future.result()
                 board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+                ai_future = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -141,6 +151,12 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+
+                    # A running search can't be interrupted, so leave it
+                    # to finish on the old executor and start a new one
+                    if ai_future is not None:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        executor = ThreadPoolExecutor(max_workers=1)
+                        ai_future = None
 
     pygame.display.flip()
@@ -105,14 +105,20 @@ def utility(board):
     return 0
 
 
-def minimax(board):
+def minimax(board, stats=None):
     """
     Returns the optimal action for the current player on the board.
+
+    If `stats` is given, its `nodes` and `cutoffs` counters are
+    incremented as the search visits positions and prunes branches.
     """
     
 
     def max_value(state, alpha, beta):
 
+        if stats is not None:
+            stats.nodes += 1
+
         if terminal(state):
             return (EMPTY, utility(state))
 
@@ -125,12 +131,17 @@ def minimax(board):
             
             alpha = max(v[1], alpha)
             if alpha >= beta:
+                if stats is not None:
+                    stats.cutoffs += 1
                 break
 
         return v
 
     def min_value(state, alpha, beta):
 
+        if stats is not None:
+            stats.nodes += 1
+
         if terminal(state):
             return (EMPTY, utility(state))
 
@@ -143,6 +154,8 @@ def minimax(board):
             
             beta = min(v[1], beta)
             if alpha >= beta:
+                if stats is not None:
+                    stats.cutoffs += 1
                 break
 
         return v
@@ -0,0 +1,226 @@
+"""
+Exact inference for heredity by variable elimination.
+
+Every person's gene count is a variable with values 0, 1 and 2. The
+pedigree compiles into one factor per person: the unconditional gene
+distribution for people without parents, and the inheritance table
+given both parents' genes for everyone else. An observed trait adds a
+factor holding its likelihood under each gene count; unobserved traits
+sum to one and drop out. Each person's gene marginal is then found by
+summing out everyone else, in min-fill order, and trait marginals
+follow from the trait probabilities given each gene count.
+
+Every table has a leading axis over parameter settings, so a sweep over
+many settings shares one compiled structure and elimination order, and
+evaluates all of them in the same array operations.
+"""
+
+import numpy as np
+
+GENES = (0, 1, 2)
+
+
+class Factor():
+    """
+    A nonnegative table with a leading axis over parameter settings,
+    then one NumPy axis per variable, indexed by the values of those
+    variables.
+    """
+
+    def __init__(self, variables, table):
+        self.variables = tuple(variables)
+        self.table = table
+
+    def expand(self, variables):
+        """
+        Returns the table with one axis per variable in `variables`, in
+        that order, of length 1 for the variables this factor lacks.
+        """
+        order = [0] + [self.variables.index(v) + 1 for v in variables
+                       if v in self.variables]
+        shape = [self.table.shape[0]] + [
+            self.table.shape[self.variables.index(v) + 1]
+            if v in self.variables else 1 for v in variables
+        ]
+        return self.table.transpose(order).reshape(shape)
+
+    def sum_out(self, variable):
+        """
+        Returns the factor with `variable` summed out.
+        """
+        axis = self.variables.index(variable)
+        rest = self.variables[:axis] + self.variables[axis + 1:]
+        return Factor(rest, self.table.sum(axis=axis + 1))
+
+
+def product(factors):
+    """
+    Returns the pointwise product of factors.
+    """
+    variables = []
+    for factor in factors:
+        for variable in factor.variables:
+            if variable not in variables:
+                variables.append(variable)
+
+    table = np.ones([1] * (len(variables) + 1))
+    for factor in factors:
+        table = table * factor.expand(variables)
+    return Factor(variables, table)
+
+
+def inheritance_table(probs):
+    """
+    Returns the array P[child, mother, father] of a child's gene count
+    given both parents' gene counts.
+    """
+    mutation = probs["mutation"]
+
+    # Chance a parent with 0, 1 or 2 copies passes the gene on
+    passes = np.array([mutation, 0.5, 1 - mutation])
+    mother = passes[:, None]
+    father = passes[None, :]
+
+    return np.array([
+        (1 - mother) * (1 - father),
+        mother * (1 - father) + (1 - mother) * father,
+        mother * father,
+    ])
+
+
+def trait_likelihood(probs, trait):
+    """
+    Returns the probability of an observed trait under each gene count.
+    """
+    return np.array([probs["trait"][gene][trait] for gene in GENES])
+
+
+def compile_factors(people, settings):
+    """
+    Returns the factors over people's gene counts whose product is, for
+    each parameter setting in `settings`, the joint probability of every
+    gene assignment and the observed traits.
+    """
+    prior = np.array([[probs["gene"][gene] for gene in GENES]
+                      for probs in settings])
+    inheritance = np.stack([inheritance_table(probs) for probs in settings])
+
+    factors = []
+    for name, person in people.items():
+        if person["mother"]:
+            factors.append(Factor(
+                (name, person["mother"], person["father"]), inheritance
+            ))
+        else:
+            factors.append(Factor((name,), prior))
+
+        if person["trait"] is not None:
+            factors.append(Factor((name,), np.stack([
+                trait_likelihood(probs, person["trait"]) for probs in settings
+            ])))
+    return factors
+
+
+def min_fill_order(factors, keep=()):
+    """
+    Returns an elimination order for every variable of factors except
+    those in `keep`. Each step picks the variable whose elimination
+    adds the fewest new edges between its neighbours, breaking ties by
+    fewest neighbours.
+    """
+    graph = dict()
+    for factor in factors:
+        for variable in factor.variables:
+            graph.setdefault(variable, set()).update(factor.variables)
+    for variable in graph:
+        graph[variable].discard(variable)
+
+    def fill(variable):
+        neighbours = list(graph[variable])
+        return sum(
+            1 for i, a in enumerate(neighbours)
+            for b in neighbours[i + 1:] if b not in graph[a]
+        )
+
+    order = []
+    remaining = [variable for variable in graph if variable not in keep]
+    while remaining:
+        variable = min(remaining, key=lambda v: (fill(v), len(graph[v])))
+        remaining.remove(variable)
+        order.append(variable)
+
+        # Eliminating a variable connects all of its neighbours
+        neighbours = graph.pop(variable)
+        for a in neighbours:
+            graph[a].discard(variable)
+            graph[a].update(neighbours - {a})
+    return order
+
+
+def eliminate(factors, order):
+    """
+    Sums the variables in `order` out of factors, one at a time.
+    Returns the factors left over.
+    """
+    factors = list(factors)
+    for variable in order:
+        touching = [f for f in factors if variable in f.variables]
+        if not touching:
+            continue
+        factors = [f for f in factors if variable not in f.variables]
+        factor = product(touching).sum_out(variable)
+
+        # Only proportions matter, so rescale to avoid underflow
+        axes = tuple(range(1, factor.table.ndim))
+        largest = factor.table.max(axis=axes, keepdims=True)
+        factor.table = factor.table / np.where(largest > 0, largest, 1)
+        factors.append(factor)
+    return factors
+
+
+def gene_marginal(factors, order, name):
+    """
+    Returns the normalized distributions of name's gene count, as an
+    array indexed by parameter setting and gene count, eliminating
+    everyone else in `order`.
+    """
+    remaining = eliminate(factors, [v for v in order if v != name])
+    table = product(remaining).expand((name,))
+    return table / table.sum(axis=1, keepdims=True)
+
+
+def variable_elimination(people, probs):
+    """
+    Returns every person's gene and trait distributions, in the same
+    form as the normalized `probabilities` of heredity.main.
+    """
+    return parameter_sweep(people, [probs])[0]
+
+
+def parameter_sweep(people, settings):
+    """
+    Returns a list with every person's gene and trait distributions
+    under each parameter setting in `settings`, each in the same form
+    as the normalized `probabilities` of heredity.main.
+    """
+    factors = compile_factors(people, settings)
+    order = min_fill_order(factors)
+    has_trait = np.array([trait_likelihood(probs, True) for probs in settings])
+
+    results = [dict() for _ in settings]
+    for name, person in people.items():
+        genes = gene_marginal(factors, order, name)
+
+        if person["trait"] is not None:
+            traits = np.full(len(settings), float(person["trait"]))
+        else:
+            traits = (genes * has_trait).sum(axis=1)
+
+        for s, probabilities in enumerate(results):
+            probabilities[name] = {
+                "gene": {gene: float(genes[s, gene])
+                         for gene in reversed(GENES)},
+                "trait": {True: float(traits[s]),
+                          False: 1 - float(traits[s])},
+            }
+    return results
@@ -1,8 +1,18 @@
+import copy
 import csv
 import itertools
+import json
+import math
+import os
+import random
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from functools import reduce
 
+from elimination import parameter_sweep, variable_elimination
+from vectorized import vectorized_enumeration
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -37,16 +47,322 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Shards of the enumeration handed out per worker process
+SHARDS_PER_PROCESS = 8
+
+# Default number of samples drawn by the sampling methods
+SAMPLES = 10000
+
+# Gibbs sampling sweeps discarded before any are counted
+BURN_IN = 500
+
+# Batches the Gibbs chain is split into to estimate its variance
+BATCHES = 20
+
+# Likelihood weighting samples drawn between precision checks
+CHECK_INTERVAL = 500
+
+# Effective samples needed before a variance estimate is trusted
+MIN_EFFECTIVE_SAMPLES = 100
+
 
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    if len(sys.argv) == 4 and sys.argv[2] == "sweep":
+        sweep(load_data(sys.argv[1]), load_grid(sys.argv[3]))
+        return
+    methods = list(METHODS) + list(SAMPLERS)
+    method = sys.argv[2] if len(sys.argv) > 2 else "elimination"
+    options = sys.argv[3:]
+    if (len(sys.argv) < 2 or method not in methods
+            or len(options) > (3 if method in SAMPLERS else 0)):
+        sys.exit(f"Usage: python heredity.py data.csv "
+                 f"[{'|'.join(METHODS)}|sweep grid.json|"
+                 f"{'|'.join(SAMPLERS)} [samples] [seed] [precision]]")
+    try:
+        samples = int(options[0]) if len(options) > 0 else SAMPLES
+        seed = int(options[1]) if len(options) > 1 else None
+        precision = float(options[2]) if len(options) > 2 else None
+    except ValueError:
+        sys.exit("Samples and seed must be integers, precision a number.")
     people = load_data(sys.argv[1])
 
+    if method in SAMPLERS:
+        stats = SamplingStats()
+        probabilities = SAMPLERS[method](
+            people, samples=samples, seed=seed, precision=precision,
+            stats=stats
+        )
+        print(f"{stats.samples} samples, effective sample size "
+              f"{stats.effective_samples:.0f}, largest standard error "
+              f"{stats.standard_error():.4f}")
+    else:
+
+        # Unrelated families are independent, so solve each on its own
+        probabilities = dict()
+        for family in families(people):
+            probabilities.update(METHODS[method](family))
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def sweep(people, grid):
+    """
+    Print every person's gene and trait distributions under every
+    parameter setting in `grid`, as CSV rows. The pedigree is compiled
+    once per family and all settings are solved together.
+    """
+    results = [dict() for _ in grid]
+    for family in families(people):
+        settings = parameter_sweep(family, [probs for _, probs in grid])
+        for result, probabilities in zip(results, settings):
+            result.update(probabilities)
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["setting", "parameters", "person", "gene 2", "gene 1",
+                     "gene 0", "trait True", "trait False"])
+    for setting, ((choices, _), probabilities) in enumerate(zip(grid, results)):
+        for person in people:
+            writer.writerow(
+                [setting, json.dumps(choices), person] +
+                [f"{probabilities[person]['gene'][gene]:.4f}"
+                 for gene in (2, 1, 0)] +
+                [f"{probabilities[person]['trait'][trait]:.4f}"
+                 for trait in (True, False)]
+            )
+
+
+def enumerate_probabilities(people):
+    """
+    Compute every person's gene and trait distributions by summing
+    the joint probability of every assignment of genes and traits.
+    """
+
     # Keep track of gene and trait probabilities for each person
-    probabilities = {
+    probabilities = empty_probabilities(people)
+
+    # Loop over all sets of people who might have the trait
+    names = set(people)
+    for have_trait in trait_sets(people):
+
+        # Loop over all sets of people who might have the gene
+        for one_gene in powerset(names):
+            for two_genes in powerset(names - one_gene):
+
+                # Update probabilities with new joint probability
+                p = joint_probability(people, one_gene, two_genes, have_trait)
+                update(probabilities, one_gene, two_genes, have_trait, p)
+
+    # Ensure probabilities sum to 1
+    normalize(probabilities)
+    return probabilities
+
+
+def parallel_enumerate_probabilities(people, processes=None, progress=True):
+    """
+    Compute the same distributions as enumerate_probabilities, with the
+    pairs of trait and one-gene sets dealt out in shards to a pool of
+    worker processes. Each worker sums a partial `probabilities` table;
+    the tables are added up before normalizing. Unless `progress` is
+    False, reports each finished shard and the overall throughput.
+    """
+    shards = SHARDS_PER_PROCESS * (processes or os.cpu_count())
+    probabilities = empty_probabilities(people)
+    evaluated = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(enumerate_shard, people, shard, shards)
+            for shard in range(shards)
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            partial, count = future.result()
+            evaluated += count
+            for person, data in partial.items():
+                for field in data:
+                    for value, p in data[field].items():
+                        probabilities[person][field][value] += p
+
+            if progress:
+                elapsed = time.perf_counter() - start
+                print(f"shard {done}/{shards}: {evaluated} joint probabilities "
+                      f"in {elapsed:.1f}s ({evaluated / elapsed:.0f}/s)",
+                      file=sys.stderr)
+
+    normalize(probabilities)
+    return probabilities
+
+
+def enumerate_shard(people, shard, shards):
+    """
+    Sum the joint probabilities of every `shards`-th pair of trait and
+    one-gene sets, starting from pair number `shard`. Return the partial
+    probabilities and how many joint probabilities were computed.
+    """
+    probabilities = empty_probabilities(people)
+    count = 0
+
+    # Every worker must list the pairs in the same order
+    names = sorted(people)
+    pairs = itertools.product(trait_sets(people), powerset(names))
+    for have_trait, one_gene in itertools.islice(pairs, shard, None, shards):
+        for two_genes in powerset(set(names) - one_gene):
+            p = joint_probability(people, one_gene, two_genes, have_trait)
+            update(probabilities, one_gene, two_genes, have_trait, p)
+            count += 1
+
+    return probabilities, count
+
+
+def trait_sets(people):
+    """
+    Return every set of people who might have the trait
+    without contradicting the known traits.
+    """
+    return [
+        have_trait for have_trait in powerset(sorted(people))
+        if not any(
+            people[person]["trait"] is not None and
+            people[person]["trait"] != (person in have_trait)
+            for person in people
+        )
+    ]
+
+
+def gene_probabilities(people):
+    """
+    Compute every person's gene and trait distributions by enumerating
+    gene assignments only.
+
+    A trait depends on nothing but its owner's genes, so unobserved
+    traits are summed out analytically rather than enumerated. People
+    are assigned genes parents first, each multiplying in one entry of
+    their compiled table, and a partial assignment whose probability
+    is zero, such as one contradicting an observed trait, is never
+    extended.
+    """
+    order = topological_order(people)
+    cpts = compile_cpts(people, order)
+    n = len(order)
+
+    gene_totals = [[0, 0, 0] for _ in order]
+    trait_totals = [[0, 0] for _ in order]
+    traits = [people[person]["trait"] for person in order]
+    genes = [0] * n
+
+    def visit(k, p):
+        if k == n:
+            for i, gene in enumerate(genes):
+                gene_totals[i][gene] += p
+                if traits[i] is None:
+                    trait_totals[i][True] += p * PROBS["trait"][gene][True]
+                    trait_totals[i][False] += p * PROBS["trait"][gene][False]
+                else:
+                    trait_totals[i][traits[i]] += p
+            return
+
+        mother, father, table = cpts[k]
+        for gene in (0, 1, 2):
+            if mother is None:
+                q = p * table[gene]
+            else:
+                q = p * table[gene][genes[mother]][genes[father]]
+            if q:
+                genes[k] = gene
+                visit(k + 1, q)
+
+    visit(0, 1)
+
+    probabilities = empty_probabilities(people)
+    for k, person in enumerate(order):
+        for gene in (0, 1, 2):
+            probabilities[person]["gene"][gene] = gene_totals[k][gene]
+        for value in (True, False):
+            probabilities[person]["trait"][value] = trait_totals[k][value]
+
+    normalize(probabilities)
+    return probabilities
+
+
+def compile_cpts(people, order):
+    """
+    Return, for each person in `order`, the positions of their mother
+    and father in `order` (None for people without parents) and their
+    probability table, with any observed trait's likelihood folded in.
+    The table is indexed by the person's gene count, then, for people
+    with parents, by the mother's and the father's.
+    """
+    position = {person: k for k, person in enumerate(order)}
+    cpts = []
+    for person in order:
+        data = people[person]
+
+        # Likelihood of the observed trait, if any, for each gene count
+        likelihood = [
+            1 if data["trait"] is None else PROBS["trait"][gene][data["trait"]]
+            for gene in (0, 1, 2)
+        ]
+
+        if not data["mother"]:
+            table = [PROBS["gene"][gene] * likelihood[gene] for gene in (0, 1, 2)]
+            cpts.append((None, None, table))
+        else:
+            table = [
+                [
+                    [inherited(mother, father)[gene] * likelihood[gene]
+                     for father in (0, 1, 2)]
+                    for mother in (0, 1, 2)
+                ]
+                for gene in (0, 1, 2)
+            ]
+            cpts.append((position[data["mother"]], position[data["father"]], table))
+    return cpts
+
+
+def families(people):
+    """
+    Split people into groups connected by mother and father links.
+    Return a list of dictionaries like `people`, one per family.
+    """
+    relatives = {person: set() for person in people}
+    for person, data in people.items():
+        for parent in (data["mother"], data["father"]):
+            if parent:
+                relatives[person].add(parent)
+                relatives[parent].add(person)
+
+    groups = []
+    seen = set()
+    for person in people:
+        if person in seen:
+            continue
+        seen.add(person)
+        frontier = [person]
+        family = set()
+        while frontier:
+            member = frontier.pop()
+            family.add(member)
+            for relative in relatives[member] - seen:
+                seen.add(relative)
+                frontier.append(relative)
+        groups.append({name: people[name] for name in people if name in family})
+    return groups
+
+
+def empty_probabilities(people):
+    """
+    Return gene and trait distributions for each person, all zero.
+    """
+    return {
         person: {
             "gene": {
                 2: 0,
@@ -61,38 +377,314 @@ def main():
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
 
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
+class SamplingStats():
+    """
+    Convergence diagnostics of a sampling run: the samples drawn, their
+    effective sample size, the largest estimated variance of any
+    estimated probability, and whether the target precision was met.
+    """
+
+    def __init__(self):
+        self.samples = 0
+        self.effective_samples = 0.0
+        self.variance = 0.0
+        self.converged = False
+
+    def standard_error(self):
+        return math.sqrt(self.variance)
+
+
+def likelihood_weighting(people, samples=SAMPLES, seed=None,
+                         precision=None, stats=None):
+    """
+    Estimate every person's gene and trait distributions by likelihood
+    weighting.
+
+    Genes are sampled from parents to children, ignoring the evidence,
+    and each sample is weighted by the probability of the observed
+    traits given its genes. Sampling stops after `samples` samples, or
+    once no estimate's standard error exceeds `precision`.
+    """
+    rng = random.Random(seed)
+    stats = stats if stats is not None else SamplingStats()
+    order = topological_order(people)
+    table = inheritance_table()
+
+    # Sums of w, w^2, w*x, w^2*x and w^2*x^2 over the samples
+    total = squared = 0
+    sums = [0] * 4 * len(order)
+    squared_sums = [0] * 4 * len(order)
+    squared_squares = [0] * 4 * len(order)
+
+    def diagnose():
+        stats.effective_samples = total ** 2 / squared if squared else 0
+        stats.variance = max(
+            (squared_squares[q] - 2 * mean * squared_sums[q]
+             + mean ** 2 * squared) / total ** 2
+            for q, mean in enumerate(value / total for value in sums)
+        ) if total else math.inf
+        stats.converged = (
+            precision is not None
+            and stats.effective_samples >= MIN_EFFECTIVE_SAMPLES
+            and stats.variance <= precision ** 2
         )
-        if fails_evidence:
-            continue
 
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
+    for i in range(1, samples + 1):
+        genes = sample_genes(people, order, rng, table)
+        w = evidence_likelihood(people, genes)
+        stats.samples = i
+        if w:
+            total += w
+            squared += w * w
+            for q, x in enumerate(observation(people, order, genes)):
+                sums[q] += w * x
+                squared_sums[q] += w * w * x
+                squared_squares[q] += w * w * x * x
+
+        if precision is not None and i % CHECK_INTERVAL == 0:
+            diagnose()
+            if stats.converged:
+                break
+
+    diagnose()
+    if not total:
+        raise ValueError("no sample is consistent with the observed traits")
+    return estimated_probabilities(
+        people, order, [value / total for value in sums]
+    )
+
+
+def gibbs_sampling(people, samples=SAMPLES, seed=None, precision=None,
+                   burn_in=BURN_IN, stats=None):
+    """
+    Estimate every person's gene and trait distributions by blocked
+    Gibbs sampling.
+
+    Each sweep resamples every block of genes, a couple or a single
+    person, from its distribution given everyone else's genes and the
+    observed traits. Resampling couples together lets the chain move
+    between states single-person updates can hardly reach. After
+    `burn_in` sweeps, each sweep is one sample, up to `samples` of
+    them or until no estimate's standard error, from batch means,
+    exceeds `precision`.
+    """
+    rng = random.Random(seed)
+    stats = stats if stats is not None else SamplingStats()
+    order = topological_order(people)
+    table = inheritance_table()
+
+    children = {person: [] for person in people}
+    for person, data in people.items():
+        if data["mother"]:
+            children[data["mother"]].append(person)
+            children[data["father"]].append(person)
+
+    # Each block with its joint gene counts and the people whose genes'
+    # probabilities depend on it
+    blocks = [
+        (block, list(itertools.product((0, 1, 2), repeat=len(block))),
+         set(block).union(*(children[person] for person in block)))
+        for block in gene_blocks(people)
+    ]
 
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+    # Start from genes that explain the observed traits
+    for _ in range(1000):
+        genes = sample_genes(people, order, rng, table)
+        if evidence_likelihood(people, genes):
+            break
+    else:
+        raise ValueError("no sample is consistent with the observed traits")
+
+    def resample_blocks():
+        for block, states, affected in blocks:
+            weights = []
+            for state in states:
+                genes.update(zip(block, state))
+                w = 1
+                for person in affected:
+                    w *= gene_chance(people, person, genes, table)
+                for person in block:
+                    if people[person]["trait"] is not None:
+                        w *= PROBS["trait"][genes[person]][people[person]["trait"]]
+                weights.append(w)
+            genes.update(zip(block, rng.choices(states, weights)[0]))
+
+    for _ in range(burn_in):
+        resample_blocks()
+
+    size = 4 * len(order)
+    batch_size = max(1, samples // BATCHES)
+    sums = [0] * size
+    squares = [0] * size
+    batch = [0] * size
+    batch_means = []
+
+    def diagnose():
+        n = stats.samples
+        means = [value / n for value in sums]
+        m = len(batch_means)
+        stats.variance = math.inf
+        stats.effective_samples = 0
+        if m >= 2:
+            errors = [
+                sum((b[q] - means[q]) ** 2 for b in batch_means) / (m - 1) / m
+                for q in range(size)
+            ]
+            stats.variance = max(errors)
+            stats.effective_samples = min(
+                (squares[q] / n - means[q] ** 2) / errors[q]
+                for q in range(size) if errors[q] > 0
+            ) if any(errors) else n
+        stats.converged = (
+            precision is not None
+            and stats.effective_samples >= MIN_EFFECTIVE_SAMPLES
+            and stats.variance <= precision ** 2
+        )
 
-    # Ensure probabilities sum to 1
-    normalize(probabilities)
+    for i in range(1, samples + 1):
+        resample_blocks()
+        stats.samples = i
+        for q, x in enumerate(observation(people, order, genes)):
+            sums[q] += x
+            squares[q] += x * x
+            batch[q] += x
+
+        if i % batch_size == 0:
+            batch_means.append([value / batch_size for value in batch])
+            batch = [0] * size
+            if precision is not None:
+                diagnose()
+                if stats.converged:
+                    break
+
+    diagnose()
+    return estimated_probabilities(
+        people, order, [value / stats.samples for value in sums]
+    )
+
+
+def topological_order(people):
+    """
+    Return the people ordered so that parents come before their children.
+    """
+    order = []
+    placed = set()
+
+    def place(person):
+        if person in placed:
+            return
+        placed.add(person)
+        if people[person]["mother"]:
+            place(people[person]["mother"])
+            place(people[person]["father"])
+        order.append(person)
 
-    # Print results
     for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+        place(person)
+    return order
+
+
+def gene_blocks(people):
+    """
+    Split people into blocks for Gibbs sampling: couples with children
+    together, then everyone left on their own.
+    """
+    blocks = []
+    blocked = set()
+    for data in people.values():
+        couple = (data["mother"], data["father"])
+        if data["mother"] and not blocked & set(couple):
+            blocks.append(couple)
+            blocked.update(couple)
+    blocks.extend((person,) for person in people if person not in blocked)
+    return blocks
+
+
+def inheritance_table():
+    """
+    Return the result of `inherited` for every pair of parents' gene
+    counts, indexed by the mother's and then the father's count.
+    """
+    return [[inherited(mother, father) for father in (0, 1, 2)]
+            for mother in (0, 1, 2)]
+
+
+def gene_chance(people, person, genes, table):
+    """
+    Return the probability of a person's gene count in `genes`
+    given their parents' gene counts, looked up in `table` from
+    `inheritance_table`.
+    """
+    data = people[person]
+    if not data["mother"]:
+        return PROBS["gene"][genes[person]]
+    return table[genes[data["mother"]]][genes[data["father"]]][genes[person]]
+
+
+def sample_genes(people, order, rng, table):
+    """
+    Sample everyone's gene count, parents first, ignoring traits.
+    Children's genes are drawn from `table`, from `inheritance_table`.
+    """
+    prior = [PROBS["gene"][gene] for gene in (0, 1, 2)]
+    genes = dict()
+    for person in order:
+        data = people[person]
+        if data["mother"]:
+            weights = table[genes[data["mother"]]][genes[data["father"]]]
+        else:
+            weights = prior
+        genes[person] = rng.choices((0, 1, 2), weights)[0]
+    return genes
+
+
+def evidence_likelihood(people, genes):
+    """
+    Return the probability of every observed trait given everyone's genes.
+    """
+    p = 1
+    for person, data in people.items():
+        if data["trait"] is not None:
+            p *= PROBS["trait"][genes[person]][data["trait"]]
+    return p
+
+
+def observation(people, order, genes):
+    """
+    Return what one sample says about each person in `order`: whether
+    they have 0, 1 and 2 copies of the gene, and the probability that
+    they have the trait given those genes.
+    """
+    x = []
+    for person in order:
+        gene = genes[person]
+        trait = people[person]["trait"]
+        x.extend((gene == 0, gene == 1, gene == 2))
+        x.append(PROBS["trait"][gene][True] if trait is None else trait)
+    return x
+
+
+def estimated_probabilities(people, order, estimates):
+    """
+    Turn the averaged observations of the people in `order` into
+    the same form as the normalized `probabilities`.
+    """
+    estimated = {
+        person: {
+            "gene": {
+                2: estimates[4 * k + 2],
+                1: estimates[4 * k + 1],
+                0: estimates[4 * k]
+            },
+            "trait": {
+                True: estimates[4 * k + 3],
+                False: 1 - estimates[4 * k + 3]
+            }
+        }
+        for k, person in enumerate(order)
+    }
+    return {person: estimated[person] for person in people}
 
 
 def load_data(filename):
@@ -117,6 +709,40 @@ def load_data(filename):
     return data
 
 
+def load_grid(filename):
+    """
+    Load a grid of parameter settings from a JSON file.
+    File assumed to be an object mapping any of "gene", "trait" and
+    "mutation" to a list of alternative values, each shaped like the
+    same entry of PROBS. Traits are keyed "true" and "false".
+    Return a list of (choices, probs) pairs, one for every combination
+    of alternatives, where probs is PROBS with those choices applied.
+    """
+    with open(filename) as f:
+        grid = json.load(f)
+
+    def parse(field, value):
+        if field == "gene":
+            return {int(gene): p for gene, p in value.items()}
+        if field == "trait":
+            return {
+                int(gene): {trait.lower() == "true": p
+                            for trait, p in traits.items()}
+                for gene, traits in value.items()
+            }
+        return value
+
+    fields = [field for field in PROBS if field in grid]
+    settings = []
+    for values in itertools.product(*(grid[field] for field in fields)):
+        choices = dict(zip(fields, values))
+        probs = copy.deepcopy(PROBS)
+        for field, value in choices.items():
+            probs[field] = parse(field, value)
+        settings.append((choices, probs))
+    return settings
+
+
 def powerset(s):
     """
     Return a list of all possible subsets of set s.
@@ -207,6 +833,24 @@ def update(probabilities, one_gene, two_genes, have_trait, p):
         probabilities[person]["gene"][gene_versions] += p
         probabilities[person]["trait"][person_trait] += p
 
+def inherited(mother, father):
+    """
+    Return the probabilities of a child having 0, 1 and 2 copies of
+    the gene, given the number of copies each parent has.
+    """
+    mutation = PROBS["mutation"]
+
+    # Chance a parent with 0, 1 or 2 copies passes the gene on
+    passes = [mutation, 0.5, 1 - mutation]
+    mom, dad = passes[mother], passes[father]
+
+    return [
+        (1 - mom) * (1 - dad),
+        mom * (1 - dad) + (1 - mom) * dad,
+        mom * dad
+    ]
+
+
 def normalize(probabilities):
     """
     Update `probabilities` such that each probability distribution
@@ -224,5 +868,21 @@ def normalize(probabilities):
 def get_gene_versions(parent, one_gene, two_genes):
     return 1 if parent in one_gene else 2 if parent in two_genes else 0
 
+# Inference methods by name, each mapping people to probabilities
+METHODS = {
+    "enumerate": enumerate_probabilities,
+    "parallel": parallel_enumerate_probabilities,
+    "genes": gene_probabilities,
+    "vectorized": lambda people: vectorized_enumeration(people, PROBS),
+    "elimination": lambda people: variable_elimination(people, PROBS),
+}
+
+# Sampling methods by name, each also taking a SamplingStats to fill in
+SAMPLERS = {
+    "weighting": likelihood_weighting,
+    "gibbs": gibbs_sampling,
+}
+
+
 if __name__ == "__main__":
     main()
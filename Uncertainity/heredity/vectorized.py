@@ -0,0 +1,98 @@
+"""
+Brute-force heredity enumeration with NumPy.
+
+Enumerates the same assignments as heredity.main, every combination of
+gene counts and of unobserved traits, but as rows of integer arrays
+rather than sets. Each person's factor of the joint probability is
+looked up in precomputed tables for a whole chunk of rows at once, and
+the marginals are weighted bincounts of those rows.
+"""
+
+import numpy as np
+
+from elimination import GENES, inheritance_table
+
+# Number of assignments evaluated per batch of array operations
+CHUNK_SIZE = 1 << 16
+
+
+def assignments(start, stop, n, unobserved):
+    """
+    Returns the gene counts and trait values of assignments start up
+    to stop, as arrays with one row per assignment and one column per
+    person. The low bits of an assignment's index give the unobserved
+    traits and the remaining base-3 digits the gene counts.
+    """
+    index = np.arange(start, stop, dtype=np.int64)
+
+    traits = np.zeros((len(index), n), dtype=np.int64)
+    for bit, k in enumerate(unobserved):
+        traits[:, k] = (index >> bit) & 1
+
+    index >>= len(unobserved)
+    genes = (index[:, None] // 3 ** np.arange(n, dtype=np.int64)) % 3
+    return genes, traits
+
+
+def vectorized_enumeration(people, probs, chunk_size=CHUNK_SIZE):
+    """
+    Returns every person's gene and trait distributions, in the same
+    form as the normalized `probabilities` of heredity.main.
+    """
+    names = list(people)
+    column = {name: k for k, name in enumerate(names)}
+    n = len(names)
+
+    prior = np.array([probs["gene"][gene] for gene in GENES])
+    inheritance = inheritance_table(probs)
+
+    # trait_table[gene, trait] with traits as 0 for False and 1 for True
+    trait_table = np.array([
+        [probs["trait"][gene][False], probs["trait"][gene][True]]
+        for gene in GENES
+    ])
+
+    unobserved = [k for k, name in enumerate(names)
+                  if people[name]["trait"] is None]
+    observed = {k: int(people[name]["trait"]) for k, name in enumerate(names)
+                if people[name]["trait"] is not None}
+
+    gene_totals = np.zeros((n, 3))
+    trait_totals = np.zeros((n, 2))
+
+    total = 3 ** n << len(unobserved)
+    for start in range(0, total, chunk_size):
+        genes, traits = assignments(
+            start, min(start + chunk_size, total), n, unobserved
+        )
+        for k, value in observed.items():
+            traits[:, k] = value
+
+        p = np.ones(len(genes))
+        for k, name in enumerate(names):
+            mother = people[name]["mother"]
+            if mother:
+                father = people[name]["father"]
+                p *= inheritance[genes[:, k],
+                                 genes[:, column[mother]],
+                                 genes[:, column[father]]]
+            else:
+                p *= prior[genes[:, k]]
+            p *= trait_table[genes[:, k], traits[:, k]]
+
+        for k in range(n):
+            gene_totals[k] += np.bincount(genes[:, k], weights=p, minlength=3)
+            trait_totals[k] += np.bincount(traits[:, k], weights=p, minlength=2)
+
+    gene_totals /= gene_totals.sum(axis=1, keepdims=True)
+    trait_totals /= trait_totals.sum(axis=1, keepdims=True)
+
+    return {
+        name: {
+            "gene": {gene: float(gene_totals[k, gene])
+                     for gene in reversed(GENES)},
+            "trait": {True: float(trait_totals[k, 1]),
+                      False: float(trait_totals[k, 0])},
+        }
+        for k, name in enumerate(names)
+    }